@@ -0,0 +1,140 @@
+"""Timing and peak memory of asv-spyglass' main entry points.
+
+Every class generates its synthetic result files once, in ``setup_cache``
+(see ``synthetic.py``), and each benchmark then reads them from disk, as
+the CLI would. The on-disk result cache is never used.
+"""
+
+from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass.compare import (
+    ResultPreparer,
+    compare_many_summary,
+    do_compare,
+    do_compare_many,
+    load_prepared,
+)
+
+from .synthetic import suite_paths, write_suite
+
+N_BENCHMARKS = [50, 500]
+# Values per parameter, two parameters per benchmark (0 for unparameterized)
+GRIDS = [0, 4]
+CONTENDERS = [1, 4]
+
+
+def _suite_dir(n_benchmarks: int, grid: int, samples: bool) -> str:
+    return f"suite-{n_benchmarks}-{grid}-{int(samples)}"
+
+
+def _write_suites(contenders: int) -> None:
+    for n_benchmarks in N_BENCHMARKS:
+        for grid in GRIDS:
+            for samples in [False, True]:
+                directory = _suite_dir(n_benchmarks, grid, samples)
+                write_suite(directory, n_benchmarks, grid, samples, contenders)
+
+
+def _suite(n_benchmarks: int, grid: int, samples: bool, contenders: int = 0):
+    return suite_paths(_suite_dir(n_benchmarks, grid, samples), contenders)
+
+
+class ReadBenchmarks:
+    """Loading and filtering benchmarks.json."""
+
+    params = (N_BENCHMARKS, GRIDS)
+    param_names = ["n_benchmarks", "grid"]
+    timeout = 300
+
+    def setup_cache(self):
+        _write_suites(contenders=0)
+
+    def setup(self, n_benchmarks, grid):
+        self.suite = _suite(n_benchmarks, grid, False)
+        # Keep the one-off import of asv out of the timings
+        ReadOnlyASVBenchmarks(self.suite.benchmarks)
+
+    def time_read(self, n_benchmarks, grid):
+        ReadOnlyASVBenchmarks(self.suite.benchmarks).benchmarks
+
+    def time_read_filtered(self, n_benchmarks, grid):
+        ReadOnlyASVBenchmarks(self.suite.benchmarks, regex=r"Suite1\d\.").benchmarks
+
+    def peakmem_read(self, n_benchmarks, grid):
+        ReadOnlyASVBenchmarks(self.suite.benchmarks).benchmarks
+
+
+class Prepare:
+    """Parsing a result file into a PreparedResult, and exporting it."""
+
+    params = (N_BENCHMARKS, GRIDS, [False, True])
+    param_names = ["n_benchmarks", "grid", "samples"]
+    timeout = 300
+
+    def setup_cache(self):
+        _write_suites(contenders=0)
+
+    def setup(self, n_benchmarks, grid, samples):
+        self.suite = _suite(n_benchmarks, grid, samples)
+        self.preparer = ResultPreparer(ReadOnlyASVBenchmarks(self.suite.benchmarks))
+        self.prepared = load_prepared(str(self.suite.baseline), self.preparer)
+
+    def time_prepare(self, n_benchmarks, grid, samples):
+        load_prepared(str(self.suite.baseline), self.preparer)
+
+    def peakmem_prepare(self, n_benchmarks, grid, samples):
+        load_prepared(str(self.suite.baseline), self.preparer)
+
+    def time_to_df(self, n_benchmarks, grid, samples):
+        self.prepared.to_df()
+
+    def peakmem_to_df(self, n_benchmarks, grid, samples):
+        self.prepared.to_df()
+
+
+class Compare:
+    """``asv-spyglass compare`` on two result files."""
+
+    params = (N_BENCHMARKS, GRIDS, [False, True])
+    param_names = ["n_benchmarks", "grid", "samples"]
+    timeout = 300
+
+    def setup_cache(self):
+        _write_suites(contenders=1)
+
+    def setup(self, n_benchmarks, grid, samples):
+        suite = _suite(n_benchmarks, grid, samples, contenders=1)
+        self.before = str(suite.baseline)
+        self.after = str(suite.contenders[0])
+        self.benchmarks = suite.benchmarks
+
+    def time_compare(self, n_benchmarks, grid, samples):
+        do_compare(self.before, self.after, self.benchmarks)
+
+    def peakmem_compare(self, n_benchmarks, grid, samples):
+        do_compare(self.before, self.after, self.benchmarks)
+
+
+class CompareMany:
+    """``asv-spyglass compare-many`` on a baseline and several contenders."""
+
+    params = (N_BENCHMARKS, GRIDS, CONTENDERS)
+    param_names = ["n_benchmarks", "grid", "contenders"]
+    timeout = 300
+
+    def setup_cache(self):
+        _write_suites(contenders=max(CONTENDERS))
+
+    def setup(self, n_benchmarks, grid, contenders):
+        suite = _suite(n_benchmarks, grid, False, contenders=max(CONTENDERS))
+        self.baseline = str(suite.baseline)
+        self.contenders = [str(path) for path in suite.contenders[:contenders]]
+        self.benchmarks = suite.benchmarks
+
+    def time_compare_many(self, n_benchmarks, grid, contenders):
+        do_compare_many(self.baseline, self.contenders, self.benchmarks)
+
+    def peakmem_compare_many(self, n_benchmarks, grid, contenders):
+        do_compare_many(self.baseline, self.contenders, self.benchmarks)
+
+    def time_compare_many_summary(self, n_benchmarks, grid, contenders):
+        compare_many_summary(self.baseline, self.contenders, self.benchmarks)
@@ -0,0 +1,165 @@
+"""Generators for synthetic ASV benchmark metadata and result files.
+
+Files are laid out like an ASV results directory, so the CLI's auto-search
+for ``benchmarks.json`` works on them too::
+
+    directory/benchmarks.json
+    directory/machine/<commit>-env<i>.json
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+RESULT_COLUMNS = [
+    "result",
+    "params",
+    "version",
+    "started_at",
+    "duration",
+    "stats_ci_99_a",
+    "stats_ci_99_b",
+    "stats_q_25",
+    "stats_q_75",
+    "stats_number",
+    "stats_repeat",
+    "samples",
+    "profile",
+]
+SAMPLES_PER_RESULT = 10
+MACHINE = "machine"
+COMMIT = "0123456789abcdef0123456789abcdef01234567"
+
+
+@dataclass
+class SyntheticSuite:
+    """Paths of a generated benchmarks.json and its result files."""
+
+    benchmarks: Path
+    baseline: Path
+    contenders: list[Path]
+
+
+def benchmark_names(n_benchmarks: int) -> list[str]:
+    """``n_benchmarks`` names, spread over modules and classes like a real suite."""
+    return [
+        f"benchmarks.mod{i % 7}.Suite{i % 31}.time_case_{i}"
+        for i in range(n_benchmarks)
+    ]
+
+
+def benchmark_params(grid: int) -> list[list[str]]:
+    """Two parameters of ``grid`` values each, or none when ``grid`` is 0."""
+    if not grid:
+        return []
+    return [[str(2**k) for k in range(grid)], [repr(f"kind{k}") for k in range(grid)]]
+
+
+def write_benchmarks_json(path: Path, n_benchmarks: int, grid: int) -> None:
+    params = benchmark_params(grid)
+    param_names = ["size", "kind"] if params else []
+    data = {
+        name: {
+            "name": name,
+            "type": "time",
+            "unit": "seconds",
+            "params": params,
+            "param_names": param_names,
+            "version": f"{i:064x}",
+        }
+        for i, name in enumerate(benchmark_names(n_benchmarks))
+    }
+    data["version"] = 2
+    Path(path).write_text(json.dumps(data))
+
+
+def write_result(
+    path: Path,
+    n_benchmarks: int,
+    grid: int,
+    samples: bool = False,
+    env_name: str = "env0",
+    seed: int = 0,
+) -> None:
+    """An ASV result file with a timing for every parameter combination.
+
+    Each ``seed`` draws its own timings around a common baseline, so files
+    written with different seeds compare with a mix of changes.
+    """
+    rng = random.Random(seed)
+    base = random.Random(0)
+    params = benchmark_params(grid)
+    n_comb = len(list(itertools.product(*params)))
+    results = {}
+    for i, name in enumerate(benchmark_names(n_benchmarks)):
+        values = [
+            base.uniform(1e-7, 1e-3) * rng.choice([0.5, 1.0, 1.0, 1.0, 2.0])
+            for _ in range(n_comb)
+        ]
+        row = {
+            "result": values,
+            "params": params,
+            "version": f"{i:064x}",
+            "started_at": 0,
+            "duration": 1.0,
+            "stats_ci_99_a": [v * 0.95 for v in values],
+            "stats_ci_99_b": [v * 1.05 for v in values],
+            "stats_q_25": [v * 0.98 for v in values],
+            "stats_q_75": [v * 1.02 for v in values],
+            "stats_number": [1] * n_comb,
+            "stats_repeat": [SAMPLES_PER_RESULT] * n_comb,
+            "samples": (
+                [
+                    [v * rng.uniform(0.97, 1.03) for _ in range(SAMPLES_PER_RESULT)]
+                    for v in values
+                ]
+                if samples
+                else None
+            ),
+            "profile": None,
+        }
+        results[name] = [row[column] for column in RESULT_COLUMNS]
+    data = {
+        "commit_hash": COMMIT,
+        "env_name": env_name,
+        "date": 0,
+        "params": {"machine": MACHINE, "python": "3.12"},
+        "python": "3.12",
+        "requirements": {},
+        "env_vars": {},
+        "result_columns": RESULT_COLUMNS,
+        "results": results,
+        "durations": {},
+        "version": 2,
+    }
+    Path(path).write_text(json.dumps(data))
+
+
+def suite_paths(directory: Path, contenders: int = 1) -> SyntheticSuite:
+    """Where ``write_suite`` puts its files."""
+    directory = Path(directory)
+    results = [
+        directory / MACHINE / f"{COMMIT[:8]}-env{seed}.json"
+        for seed in range(contenders + 1)
+    ]
+    return SyntheticSuite(directory / "benchmarks.json", results[0], results[1:])
+
+
+def write_suite(
+    directory: Path,
+    n_benchmarks: int,
+    grid: int,
+    samples: bool = False,
+    contenders: int = 1,
+) -> SyntheticSuite:
+    """benchmarks.json, a baseline and ``contenders`` result files to compare."""
+    suite = suite_paths(directory, contenders)
+    suite.baseline.parent.mkdir(parents=True, exist_ok=True)
+    write_benchmarks_json(suite.benchmarks, n_benchmarks, grid)
+    for seed, path in enumerate([suite.baseline, *suite.contenders]):
+        write_result(path, n_benchmarks, grid, samples, f"env{seed}", seed)
+    return suite
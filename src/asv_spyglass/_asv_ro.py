@@ -1,10 +1,296 @@
+import bisect
+import hashlib
 import itertools
+import json
+import math
+import os
+import pickle
 import re
+import tempfile
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sequence
 from pathlib import Path
 
-from asv.util import load_json as asv_json_load  # type: ignore[import-untyped]
+from asv_spyglass._aux import file_identity, getstrform
+from asv_spyglass.profiling import phase
 
-from asv_spyglass._aux import getstrform
+
+def build_base_index(benchmarks: dict[str, dict]) -> dict[str, dict]:
+    """Index (possibly parameter-expanded) benchmark entries by base name."""
+    index = {}
+    for key, benchmark in benchmarks.items():
+        index.setdefault(benchmark.get("name", key), benchmark)
+    return index
+
+
+# Constructs which may look further ahead than the next character
+_LOOKS_AHEAD = ("$", r"\Z", "(?=", "(?!", "(?(")
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+# Separators between the base name and parameter values in expanded names,
+# including the space after a comma
+_NAME_SEPARATORS = re.compile(r", ?|[()]")
+
+
+def expand_names(name: str, params: list[list[str]]) -> Iterator[str]:
+    """Expanded names, in ``itertools.product`` order, as asv formats them."""
+    if not params:
+        yield name
+        return
+    for param_set in itertools.product(*params):
+        yield f"{name}({', '.join(param_set)})"
+
+
+def param_values(params: list[list[str]], idx: int) -> tuple[str, ...]:
+    """The ``idx``-th combination of ``itertools.product(*params)``."""
+    values = []
+    for param in reversed(params):
+        idx, pos = divmod(idx, len(param))
+        values.append(param[pos])
+    return tuple(reversed(values))
+
+
+def expanded_name(name: str, params: list[list[str]], idx: int) -> str:
+    """The ``idx``-th name of ``expand_names(name, params)``."""
+    if not params:
+        return name
+    return f"{name}({', '.join(param_values(params, idx))})"
+
+
+def _required_literal(pattern: str) -> str:
+    """A separator-free literal which every match of ``pattern`` contains.
+
+    Conservatively taken from the literal prefix of the pattern; empty if
+    there is none.
+    """
+    if "|" in pattern:
+        return ""
+    chars = []
+    pos = 1 if pattern.startswith("^") else 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == "\\" and pos + 1 < len(pattern) and not pattern[pos + 1].isalnum():
+            chars.append(pattern[pos + 1])
+            pos += 2
+        elif char in _REGEX_META:
+            if char in "*?{" and chars:
+                chars.pop()  # The quantifier makes the last character optional
+            break
+        else:
+            chars.append(char)
+            pos += 1
+    # A space next to a separator may not be in the value (e.g. " 'a'" can
+    # match ", 'a'"), while inner spaces may (e.g. in "'a b'")
+    pieces = _NAME_SEPARATORS.split("".join(chars))
+    return max((piece.strip() for piece in pieces), key=len)
+
+
+class _AnyPattern:
+    """Searches for any of several patterns which cannot share one regex."""
+
+    def __init__(self, patterns: list[re.Pattern]):
+        self._patterns = patterns
+
+    def search(self, name: str) -> bool:
+        return any(pattern.search(name) for pattern in self._patterns)
+
+
+def _compile_any(regex: list[str]) -> re.Pattern | _AnyPattern:
+    """Compile patterns into a single alternation, if their flags allow it."""
+    try:
+        return re.compile("|".join(f"(?:{reg})" for reg in regex))
+    except re.error:
+        # e.g. global inline flags, which must start the whole expression
+        return _AnyPattern([re.compile(reg) for reg in regex])
+
+
+class BenchmarkFilter:
+    """Selects parameter combinations whose expanded names match any regex.
+
+    The regexes are compiled once into a single alternation, and whole
+    benchmarks are accepted or pruned before expanding their parameters
+    where possible. A match inside the base name carries over to every
+    expanded name, since they all continue with ``(`` (unless the pattern
+    looks further ahead than that). Otherwise a match needs the pattern's
+    required literal, which can only lie within a single parameter value, so
+    only combinations with such a value are expanded and searched.
+    """
+
+    def __init__(self, regex: list[str]):
+        self.patterns = list(regex)
+        self._compiled = _compile_any(regex) if regex else None
+        self._prefix_safe = [
+            re.compile(reg)
+            for reg in regex
+            if not any(token in reg for token in _LOOKS_AHEAD)
+        ]
+        self._literals = [_required_literal(reg) for reg in regex]
+        # Plain literals match exactly where they occur in a value
+        self._exact = all(lit == reg for lit, reg in zip(self._literals, regex))
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def search(self, name: str) -> bool:
+        return self._compiled is None or self._compiled.search(name) is not None
+
+    def select(self, name: str, params: list[list[str]]) -> Sequence[int]:
+        """Sorted indices into ``expand_names(name, params)`` that match."""
+        n_comb = math.prod(len(p) for p in params)
+        if self._compiled is None:
+            return range(n_comb)
+        if not params:
+            return range(1) if self._compiled.search(name) else range(0)
+        for pattern in self._prefix_safe:
+            match = pattern.search(f"{name}(")
+            if match and match.end() <= len(name):
+                return range(n_comb)
+        if not all(self._literals) or any(lit in name for lit in self._literals):
+            candidates: Sequence[int] = range(n_comb)
+        else:
+            candidates = self._with_values_containing(params, self._literals)
+            if self._exact and not isinstance(candidates, range):
+                return candidates
+        if isinstance(candidates, range):
+            expanded = enumerate(expand_names(name, params))
+        else:
+            expanded = ((idx, expanded_name(name, params, idx)) for idx in candidates)
+        return [idx for idx, full in expanded if self._compiled.search(full)]
+
+    @staticmethod
+    def _with_values_containing(
+        params: list[list[str]], literals: list[str]
+    ) -> Sequence[int]:
+        """Combinations in which some value contains one of ``literals``."""
+        sizes = [len(p) for p in params]
+        strides = [math.prod(sizes[pos + 1 :]) for pos in range(len(sizes))]
+        hits = [
+            [
+                k
+                for k, value in enumerate(param)
+                if any(lit in value for lit in literals)
+            ]
+            for param in params
+        ]
+        n_comb = math.prod(sizes)
+        n_missing = math.prod(size - len(h) for size, h in zip(sizes, hits))
+        if n_comb - n_missing > n_comb // 2:
+            return range(n_comb)  # Cheaper to enumerate everything
+        selected: set[int] = set()
+        for pos, pos_hits in enumerate(hits):
+            if not pos_hits:
+                continue
+            choices = [
+                pos_hits if other == pos else range(size)
+                for other, size in enumerate(sizes)
+            ]
+            for combo in itertools.product(*choices):
+                selected.add(sum(k * stride for k, stride in zip(combo, strides)))
+        return sorted(selected)
+
+
+def _decode_values(values: str, params: list[list[str]]) -> int | None:
+    """Index of the combination which ``expanded_name`` formats as ``values``.
+
+    Backtracks, since parameter values may themselves contain ``", "``.
+    """
+
+    def walk(pos: int, start: int, idx: int) -> int | None:
+        if pos == len(params):
+            return idx if start == len(values) else None
+        sep = ", " if pos < len(params) - 1 else ""
+        for k, value in enumerate(params[pos]):
+            end = start + len(value)
+            if values.startswith(value, start) and values.startswith(sep, end):
+                found = walk(pos + 1, end + len(sep), idx * len(params[pos]) + k)
+                if found is not None:
+                    return found
+        return None
+
+    return walk(0, 0, 0)
+
+
+class BenchmarkIndex(Mapping[str, dict]):
+    """Read-only mapping of expanded benchmark names to their metadata.
+
+    Only the base benchmarks and the indices of their selected parameter
+    combinations are stored (as a ``range`` when all are selected, else a
+    compact integer array); expanded names are formatted while iterating
+    and decoded on lookup. Memory thus scales with the number of benchmarks
+    and parameter values, not with the size of the parameter grid.
+    """
+
+    def __init__(self):
+        # Base name -> (metadata, parameter values as strings, selection)
+        self._entries: dict[str, tuple[dict, list[list[str]], Sequence[int]]] = {}
+        self._base_index: dict[str, dict] = {}
+        self._len = 0
+
+    def add(self, benchmark: dict, params: list[list[str]], selection) -> None:
+        """Add a benchmark with the given selected parameter combinations."""
+        if not selection:
+            return
+        if not isinstance(selection, range):
+            selection = array("q", selection)
+        self._entries[benchmark["name"]] = (benchmark, params, selection)
+        self._base_index[benchmark["name"]] = benchmark
+        self._len += len(selection)
+
+    def selection(self, name: str) -> Sequence[int]:
+        """Selected indices into ``expand_names`` for the base ``name``."""
+        entry = self._entries.get(name)
+        return entry[2] if entry is not None else range(0)
+
+    @property
+    def base_index(self) -> dict[str, dict]:
+        """Map base benchmark names to their metadata."""
+        return self._base_index
+
+    def __getitem__(self, key: str) -> dict:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not entry[1]:
+                return entry[0]
+            raise KeyError(key)
+        base, paren, values = key.partition("(")
+        entry = self._entries.get(base)
+        if entry is None or not paren or not values.endswith(")"):
+            raise KeyError(key)
+        benchmark, params, selection = entry
+        idx = _decode_values(values[:-1], params)
+        if idx is None:
+            raise KeyError(key)
+        if not isinstance(selection, range):
+            pos = bisect.bisect_left(selection, idx)
+            if pos == len(selection) or selection[pos] != idx:
+                raise KeyError(key)
+        elif idx not in selection:
+            raise KeyError(key)
+        return benchmark
+
+    def __iter__(self) -> Iterator[str]:
+        for name, (_, params, selection) in self._entries.items():
+            if isinstance(selection, range) and len(selection) == math.prod(
+                len(p) for p in params
+            ):
+                yield from expand_names(name, params)
+            else:
+                for idx in selection:
+                    yield expanded_name(name, params, idx)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} of {len(self)} benchmarks>"
+
+
+def _as_list(regex: str | list[str] | None) -> list[str]:
+    if not regex:
+        return []
+    if isinstance(regex, str):
+        return [regex]
+    return list(regex)
 
 
 class ReadOnlyASVBenchmarks:
@@ -17,44 +303,139 @@ class ReadOnlyASVBenchmarks:
     ):
         """Load benchmarks from a JSON file, optionally filtering by regex."""
         self._base_benchmarks = {}  # Store all benchmarks here
-        self._benchmark_selection: dict[str, list[int]] = {}
-        self.filtered_benchmarks = {}  # Store selected benchmarks here after parameter expansion
+        # Selected benchmarks, by name after parameter expansion
+        self.filtered_benchmarks = BenchmarkIndex()
+
+        regex = _as_list(regex)
+
+        # Identifies the loaded metadata, e.g. for caching derived results
+        self.identity = (
+            file_identity(benchmarks_file) if benchmarks_file is not None else None,
+            tuple(regex),
+        )
 
         if benchmarks_file is None:
             return
 
-        d = asv_json_load(getstrform(benchmarks_file), api_version=self.api_version)
+        # Deferred, since importing asv loads all of its plugins
+        from asv.util import load_json as asv_json_load  # type: ignore[import-untyped]
 
-        if not regex:
-            regex = []
-        if isinstance(regex, str):
-            regex = [regex]
+        d = asv_json_load(getstrform(benchmarks_file), api_version=self.api_version)
+        bfilter = BenchmarkFilter(regex)
 
         for benchmark in d.values():
-            self._base_benchmarks[benchmark["name"]] = benchmark
-            if benchmark.get("params"):
-                self._benchmark_selection[benchmark["name"]] = []
-                param_tuples = [tuple(map(str, p)) for p in benchmark["params"]]
-                for idx, param_set in enumerate(itertools.product(*param_tuples)):
-                    name = f"{benchmark['name']}({', '.join(param_set)})"
-                    if not regex or any(re.search(reg, name) for reg in regex):
-                        self.filtered_benchmarks[name] = (
-                            benchmark  # Store with full name
-                        )
-                        self._benchmark_selection[benchmark["name"]].append(idx)
-            else:
-                self._benchmark_selection[benchmark["name"]] = []
-                if not regex or any(re.search(reg, benchmark["name"]) for reg in regex):
-                    self.filtered_benchmarks[benchmark["name"]] = benchmark
+            name = benchmark["name"]
+            self._base_benchmarks[name] = benchmark
+            params = [
+                [str(p) for p in param] for param in benchmark.get("params") or []
+            ]
+            self.filtered_benchmarks.add(
+                benchmark, params, bfilter.select(name, params)
+            )
 
     def __repr__(self) -> str:
         """Return a string representation of the filtered benchmarks."""
         import pprint
 
         pp = pprint.PrettyPrinter()
-        return pp.pformat(self.filtered_benchmarks)
+        return pp.pformat(dict(self.filtered_benchmarks))
+
+    @property
+    def regex(self) -> list[str]:
+        """Patterns the benchmarks were selected by; empty to select all."""
+        return list(self.identity[1])
 
     @property
-    def benchmarks(self) -> dict[str, dict]:
-        """Get a dictionary of filtered benchmarks."""
+    def benchmarks(self) -> BenchmarkIndex:
+        """Get a mapping of filtered benchmarks."""
         return self.filtered_benchmarks
+
+    @property
+    def base_index(self) -> dict[str, dict]:
+        """Map base benchmark names to their metadata, for selected benchmarks."""
+        return self.filtered_benchmarks.base_index
+
+
+# Bump whenever the pickled layout of ReadOnlyASVBenchmarks changes
+COMPILED_VERSION = 1
+# Loaded metadata kept per process, and compiled files kept on disk
+MAX_LOADED = 8
+MAX_COMPILED = 64
+
+_loaded: OrderedDict[tuple, ReadOnlyASVBenchmarks] = OrderedDict()
+
+
+def _compiled_path(cache_dir: Path, identity: tuple) -> Path:
+    key = json.dumps([COMPILED_VERSION, identity])
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return Path(cache_dir) / "benchmarks" / f"{digest}.pickle"
+
+
+def _read_compiled(path: Path) -> ReadOnlyASVBenchmarks | None:
+    try:
+        with open(path, "rb") as fd:
+            benchmarks = pickle.load(fd)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        path.unlink(missing_ok=True)  # Corrupt or truncated
+        return None
+    os.utime(path)  # Mark as recently used
+    return benchmarks
+
+
+def _write_compiled(path: Path, benchmarks: ReadOnlyASVBenchmarks) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            pickle.dump(benchmarks, out, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    compiled = sorted(path.parent.glob("*.pickle"), key=lambda p: p.stat().st_mtime)
+    for stale in compiled[:-MAX_COMPILED]:
+        stale.unlink(missing_ok=True)
+
+
+def load_benchmarks(
+    benchmarks_file: Path | None,
+    regex: str | list[str] | None = None,
+    cache_dir: Path | None = None,
+) -> ReadOnlyASVBenchmarks:
+    """``ReadOnlyASVBenchmarks``, reused while the file is unchanged.
+
+    Loaded metadata is kept for the ``MAX_LOADED`` most recently used
+    combinations of file (path, modification time and size) and regex, so
+    repeated comparisons parse benchmarks.json once per process. The result
+    is shared and must not be modified.
+
+    With a ``cache_dir``, the parsed metadata is also kept there in compiled
+    (pickled) form, which later processes load without parsing the JSON.
+    """
+    with phase("benchmarks") as handle:
+        benchmarks = _load_benchmarks(benchmarks_file, regex, cache_dir)
+        handle.items = len(benchmarks.benchmarks)
+    return benchmarks
+
+
+def _load_benchmarks(
+    benchmarks_file: Path | None, regex: str | list[str] | None, cache_dir: Path | None
+) -> ReadOnlyASVBenchmarks:
+    if benchmarks_file is None:
+        return ReadOnlyASVBenchmarks(None, regex)
+    identity = (file_identity(benchmarks_file), tuple(_as_list(regex)))
+    if (benchmarks := _loaded.get(identity)) is not None:
+        _loaded.move_to_end(identity)
+        return benchmarks
+
+    compiled = _compiled_path(cache_dir, identity) if cache_dir else None
+    benchmarks = _read_compiled(compiled) if compiled else None
+    if benchmarks is None:
+        benchmarks = ReadOnlyASVBenchmarks(benchmarks_file, regex)
+        if compiled:
+            _write_compiled(compiled, benchmarks)
+    _loaded[identity] = benchmarks
+    while len(_loaded) > MAX_LOADED:
+        _loaded.popitem(last=False)
+    return benchmarks
@@ -1,5 +1,20 @@
+import os
 from pathlib import Path
 
 
 def getstrform(pathobj: Path) -> str:
     return str(pathobj.absolute())
+
+
+def file_identity(pathobj: Path | str) -> tuple[str, int, int]:
+    """Absolute path, modification time and size, to detect changed files."""
+    st = os.stat(pathobj)
+    return (getstrform(Path(pathobj)), st.st_mtime_ns, st.st_size)
+
+
+def default_cache_dir() -> Path:
+    """``$ASV_SPYGLASS_CACHE_DIR``, else ``asv-spyglass`` in the user cache."""
+    if env_dir := os.environ.get("ASV_SPYGLASS_CACHE_DIR"):
+        return Path(env_dir)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache) / "asv-spyglass"
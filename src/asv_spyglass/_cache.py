@@ -0,0 +1,188 @@
+"""Caches of prepared results and of comparisons."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+import polars as pl
+
+from asv_spyglass._aux import default_cache_dir, file_identity
+from asv_spyglass.results import PreparedResult
+
+# Bump whenever the layout of PreparedResult.frame changes
+CACHE_VERSION = 2
+
+
+class ResultCache:
+    """Size-bounded LRU cache of prepared results, stored as Parquet files.
+
+    Entries are keyed on the result file's path, modification time and size
+    together with the identity of the benchmarks metadata used to prepare
+    it and whether raw samples were kept, so a changed file or
+    benchmarks.json is simply a cache miss.
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = 512 * 2**20):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry(self, result_path: str, identity, samples: bool) -> Path | None:
+        if identity is None:
+            return None
+        key = json.dumps([CACHE_VERSION, file_identity(result_path), identity, samples])
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / f"{digest}.parquet"
+
+    def get(
+        self, result_path: str, identity, samples: bool = True
+    ) -> PreparedResult | None:
+        entry = self._entry(result_path, identity, samples)
+        if entry is None or not entry.exists():
+            return None
+        try:
+            prepared = PreparedResult.read_parquet(entry)
+        except Exception:
+            entry.unlink(missing_ok=True)  # Corrupt or truncated
+            return None
+        os.utime(entry)  # Mark as recently used
+        return prepared
+
+    def put(
+        self,
+        result_path: str,
+        identity,
+        prepared: PreparedResult,
+        samples: bool = True,
+    ) -> None:
+        entry = self._entry(result_path, identity, samples)
+        if entry is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            prepared.write_parquet(tmp)
+            os.replace(tmp, entry)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until under ``max_bytes``."""
+        entries = []
+        for entry in self.directory.glob("*.parquet"):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue  # Evicted concurrently
+            entries.append((st.st_mtime_ns, st.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for entry in self.directory.glob("*.parquet"):
+            entry.unlink(missing_ok=True)
+
+
+class MemoryCache:
+    """In-process LRU cache of prepared results, in front of a ``ResultCache``.
+
+    Takes the place of a ``ResultCache`` for a long-running process: the
+    ``max_entries`` most recently used prepared results are kept as they
+    are, along with whatever they computed since (see ``PreparedResult``).
+    An entry is dropped as soon as its result file's modification time or
+    size changes, and a different benchmarks.json is a different entry.
+    Misses fall through to ``backing``, if any.
+    """
+
+    def __init__(self, backing: ResultCache | None = None, max_entries: int = 64):
+        self.backing = backing
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple, PreparedResult]] = OrderedDict()
+
+    @property
+    def directory(self) -> Path | None:
+        return self.backing.directory if self.backing is not None else None
+
+    def get(
+        self, result_path: str, identity, samples: bool = True
+    ) -> PreparedResult | None:
+        if identity is None:
+            return None
+        stamp = file_identity(result_path)
+        key = json.dumps([stamp[0], identity, samples])
+        if (entry := self._entries.get(key)) is not None:
+            if entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]  # The file changed
+        if self.backing is None:
+            return None
+        prepared = self.backing.get(result_path, identity, samples)
+        if prepared is not None:
+            self._remember(key, stamp, prepared)
+        return prepared
+
+    def put(
+        self,
+        result_path: str,
+        identity,
+        prepared: PreparedResult,
+        samples: bool = True,
+    ) -> None:
+        if identity is None:
+            return
+        if self.backing is not None:
+            self.backing.put(result_path, identity, prepared, samples)
+        stamp = file_identity(result_path)
+        self._remember(json.dumps([stamp[0], identity, samples]), stamp, prepared)
+
+    def _remember(self, key: str, stamp: tuple, prepared: PreparedResult) -> None:
+        self._entries[key] = (stamp, prepared)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ComparisonState:
+    """Classified rows of the last comparison, kept in one Parquet file.
+
+    Rows carry the ``fingerprint`` of their inputs, so a later comparison
+    can reuse those which did not change; see
+    ``changes.classify_changes_incremental``. A missing or unreadable file
+    is treated as no previous comparison.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> pl.DataFrame | None:
+        try:
+            return pl.read_parquet(self.path)
+        except Exception:
+            return None
+
+    def save(self, frame: pl.DataFrame) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            frame.write_parquet(tmp)
+            os.replace(tmp, self.path)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
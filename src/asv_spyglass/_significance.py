@@ -0,0 +1,198 @@
+"""Vectorized significance tests on raw benchmark samples.
+
+These back the opt-in ``mann-whitney`` and ``bootstrap`` significance modes
+of ``classify_changes``. Samples are ragged (one list per benchmark), so each
+test pads or groups them into 2D arrays, processing many benchmarks at once.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError(
+        "Sample-based significance tests need NumPy; "
+        "install it with `pip install asv_spyglass[stats]`."
+    ) from exc
+
+# Same threshold as asv's Mann-Whitney check in ``_stats.is_different``
+MANN_WHITNEY_THRESHOLD = 0.002
+# Largest sample size for which the exact U distribution is used, as in asv
+MANN_WHITNEY_EXACT_MAX = 20
+# Bootstrap confidence level, matching the 99% intervals asv stores
+BOOTSTRAP_CONFIDENCE = 0.99
+BOOTSTRAP_RESAMPLES = 1000
+# Fewer samples than this on either side make for a degenerate bootstrap
+BOOTSTRAP_MIN_SAMPLES = 5
+# Upper bound on the elements of intermediate arrays, per chunk
+_CHUNK_ELEMENTS = 2**22
+
+
+def _padded(samples: list[list[float]]) -> tuple[np.ndarray, np.ndarray]:
+    """Samples as a NaN-padded 2D array, valid values first in each row."""
+    width = max((len(s) for s in samples), default=0)
+    out = np.full((len(samples), width), np.nan)
+    for row, values in enumerate(samples):
+        out[row, : len(values)] = values
+    out.sort(axis=1)  # NaNs sort last
+    return out, np.count_nonzero(~np.isnan(out), axis=1)
+
+
+def _chunks(nrows: int, per_row: int):
+    step = max(1, _CHUNK_ELEMENTS // max(per_row, 1))
+    for start in range(0, nrows, step):
+        yield slice(start, min(start + step, nrows))
+
+
+@functools.cache
+def _u_cdf(m: int, n: int) -> np.ndarray:
+    """CDF of the Mann-Whitney U statistic for samples of sizes ``m``, ``n``.
+
+    Counts the orderings giving each U with the recurrence of asv's
+    ``mann_whitney_u_r``, r(i, j, u) = r(i, j - 1, u) + r(i - 1, j, u - j),
+    one row of ``i`` at a time.
+    """
+    rows = [np.ones(1, dtype=np.int64)] * (n + 1)
+    for i in range(1, m + 1):
+        row = [np.ones(1, dtype=np.int64)]
+        for j in range(1, n + 1):
+            counts = np.zeros(i * j + 1, dtype=np.int64)
+            counts[: len(row[j - 1])] += row[j - 1]
+            counts[j:] += rows[j]
+            row.append(counts)
+        rows = row
+    return np.cumsum(rows[n]) / math.comb(m + n, m)
+
+
+def _exact_p_values(
+    greater: np.ndarray, ties: np.ndarray, n1: np.ndarray, n2: np.ndarray
+) -> np.ndarray:
+    """Two-sided p-values from the exact U distribution, as asv computes them.
+
+    Ties are broken the least significant way, like ``mann_whitney_u``.
+    """
+    mn = n1 * n2
+    half = mn // 2
+    ties = np.where((greater <= half) & (greater + ties >= half), half - greater, ties)
+    ux = np.maximum(
+        np.minimum(greater, mn - greater),
+        np.minimum(greater + ties, mn - greater - ties),
+    )
+    p_value = np.empty(len(mn))
+    sizes = np.stack([n1, n2], axis=1)
+    for m, n in np.unique(sizes, axis=0):
+        rows = np.flatnonzero((n1 == m) & (n2 == n))
+        cdf = _u_cdf(int(m), int(n))
+        upper = np.maximum(half[rows], mn[rows] - ux[rows] - 1)
+        p_value[rows] = cdf[ux[rows]] + 1 - cdf[upper]
+    return p_value
+
+
+def mann_whitney(
+    samples_a: list[list[float]], samples_b: list[list[float]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Two-sided Mann-Whitney U p-values, one per pair of sample lists.
+
+    Like asv, uses the exact U distribution when neither side has more than
+    ``MANN_WHITNEY_EXACT_MAX`` samples, and otherwise the normal
+    approximation with tie and continuity corrections. Also returns whether
+    each test could reach ``MANN_WHITNEY_THRESHOLD`` at all given the sample
+    sizes, as asv requires before trusting it.
+    """
+    a, n1 = _padded(samples_a)
+    b, n2 = _padded(samples_b)
+    greater = np.empty(len(a), dtype=np.int64)
+    equal = np.empty(len(a), dtype=np.int64)
+    ties = np.empty(len(a))
+    width = a.shape[1] + b.shape[1]
+    for rows in _chunks(len(a), width * width):
+        ca, cb = a[rows, :, None], b[rows, None, :]
+        greater[rows] = (ca > cb).sum(axis=(1, 2))
+        equal[rows] = (ca == cb).sum(axis=(1, 2))
+        both = np.concatenate([a[rows], b[rows]], axis=1)
+        counts = (both[:, :, None] == both[:, None, :]).sum(axis=2)
+        # Each group of t tied values contributes t * (t**2 - 1)
+        ties[rows] = np.where(counts > 0, counts**2 - 1, 0).sum(axis=1)
+
+    u = greater + 0.5 * equal
+    n = n1 + n2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+        z = (np.abs(u - n1 * n2 / 2) - 0.5) / np.sqrt(variance)
+    z = np.where(variance > 0, np.maximum(z, 0), 0)
+    p_value = np.array([math.erfc(v / math.sqrt(2)) for v in z])
+    exact = (np.minimum(n1, n2) > 0) & (np.maximum(n1, n2) <= MANN_WHITNEY_EXACT_MAX)
+    if exact.any():
+        p_value[exact] = _exact_p_values(
+            greater[exact], equal[exact], n1[exact], n2[exact]
+        )
+    p_min = np.array(
+        [
+            1 / math.comb(int(k1 + k2), int(min(k1, k2))) if k1 and k2 else 1.0
+            for k1, k2 in zip(n1, n2)
+        ]
+    )
+    return p_value, p_min < MANN_WHITNEY_THRESHOLD
+
+
+def _index(u: np.ndarray, count: int) -> np.ndarray:
+    return np.minimum(np.floor(u * count), count - 1).astype(np.intp)
+
+
+def _bootstrap_medians(
+    samples: list[list[float]], rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Medians of ``BOOTSTRAP_RESAMPLES`` resamples of each sample list.
+
+    Also returns the number of (non-NaN) samples in each list.
+    """
+    values, counts = _padded(samples)
+    medians = np.full((len(values), BOOTSTRAP_RESAMPLES), np.nan)
+    # Each row is sorted, so the median of a resample only depends on the
+    # middle order statistics of the drawn indices. Indices drawn uniformly
+    # from ``range(n)`` are ``floor(n * u)`` for uniform ``u``, and the k-th
+    # smallest of n uniforms is Beta(k, n - k + 1) distributed (the next one
+    # lies a Beta(1, n - k) fraction of the rest of the way to 1), so those
+    # are drawn directly instead of resampling and sorting whole rows.
+    for count in np.unique(counts):
+        if count == 0:
+            continue
+        rows = np.flatnonzero(counts == count)
+        size = (len(rows), BOOTSTRAP_RESAMPLES)
+        rank = (count + 1) // 2
+        u_low = rng.beta(rank, count - rank + 1, size=size)
+        if count % 2:
+            u_high = u_low
+        else:
+            u_high = u_low + (1 - u_low) * rng.beta(1, count - rank, size=size)
+        block = values[rows, :count]
+        medians[rows] = (
+            np.take_along_axis(block, _index(u_low, count), axis=1)
+            + np.take_along_axis(block, _index(u_high, count), axis=1)
+        ) / 2
+    return medians, counts
+
+
+def bootstrap_ratio(
+    samples_a: list[list[float]],
+    samples_b: list[list[float]],
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bootstrap confidence intervals for the ratio of medians ``b / a``.
+
+    Returns the lower and upper bounds at ``BOOTSTRAP_CONFIDENCE``, and
+    whether both sides have at least ``BOOTSTRAP_MIN_SAMPLES`` samples.
+    Resampling is driven by ``seed``, so results are reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    medians_a, counts_a = _bootstrap_medians(samples_a, rng)
+    medians_b, counts_b = _bootstrap_medians(samples_b, rng)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = medians_b / medians_a
+    tail = (1 - BOOTSTRAP_CONFIDENCE) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail], axis=1)
+    enough = np.minimum(counts_a, counts_b) >= BOOTSTRAP_MIN_SAMPLES
+    return low, high, enough
@@ -0,0 +1,238 @@
+"""Incremental reader for ASV result files."""
+
+from __future__ import annotations
+
+import json
+import math
+from collections.abc import Iterator
+from pathlib import Path
+
+from asv_spyglass._asv_ro import BenchmarkFilter
+from asv_spyglass._aux import getstrform
+from asv_spyglass.results import ASVResult
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Scanner:
+    """Pull JSON tokens and values out of a file read in chunks.
+
+    Only the unconsumed tail of the file is kept in memory, plus whatever
+    value is being decoded.
+    """
+
+    def __init__(self, fd, chunk_size: int):
+        self._fd = fd
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        # Grow geometrically, so decoding a large value is not quadratic
+        chunk = self._fd.read(max(self._chunk_size, len(self._buf) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of file")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buf) and not self._eof:
+                # A number may continue in the next chunk
+                if self._fill():
+                    continue
+            self._pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Iterate over the keys of an object; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def is_benchmarks_file(path, chunk_size: int = 2**20) -> bool:
+    """Whether ``path`` holds benchmarks.json metadata rather than results.
+
+    Metadata has a top-level ``version`` and benchmark entries, but no
+    ``results``; reading stops at the ``results`` of a result file.
+    """
+    has_version = has_benchmarks = False
+    try:
+        with open(getstrform(Path(path)), encoding="utf-8") as fd:
+            scanner = _Scanner(fd, chunk_size)
+            for key in scanner.members():
+                if key == "results":
+                    return False
+                value = scanner.value()
+                if key == "version":
+                    has_version = True
+                elif isinstance(value, dict) and "name" in value:
+                    has_benchmarks = True
+    except ValueError:
+        return False
+    return has_version and has_benchmarks
+
+
+def _per_param(values, n_comb: int) -> list:
+    """Per-parameter-combination values, like asv's ``_compatible_results``."""
+    if values is None:
+        return [None] * n_comb
+    values = list(values[:n_comb])
+    return values + [None] * (n_comb - len(values))
+
+
+class ResultStream:
+    """Read an ASV result file one benchmark at a time.
+
+    Iterating yields ``ASVResult`` records, in the same shape as
+    ``result_iter`` produces from a fully loaded ``asv.results.Results``, but
+    only one benchmark's data is materialised at any time. Raw ``samples``
+    are dropped (reported as missing) unless ``samples`` is true.
+
+    With a ``bench`` filter, benchmarks none of whose parameter combinations
+    it selects are skipped before their statistics and samples are gathered.
+    """
+
+    api_version = 2
+
+    def __init__(
+        self,
+        path,
+        samples: bool = True,
+        chunk_size: int = 2**20,
+        bench: BenchmarkFilter | None = None,
+    ):
+        self.path = Path(path)
+        self.samples = samples
+        self.chunk_size = chunk_size
+        self.bench = bench
+        self.header: dict = {}
+
+    @property
+    def machine(self) -> str:
+        return self.header["params"]["machine"]
+
+    @property
+    def env_name(self) -> str:
+        return self.header["env_name"]
+
+    @property
+    def commit_hash(self) -> str | None:
+        return self.header.get("commit_hash")
+
+    @property
+    def date(self) -> int | None:
+        return self.header.get("date")
+
+    def read_header(self) -> dict:
+        """Read the top-level fields preceding the per-benchmark results."""
+        for _ in self._records(header_only=True):
+            pass
+        return self.header
+
+    def __iter__(self) -> Iterator[ASVResult]:
+        return self._records(header_only=False)
+
+    def _records(self, header_only: bool) -> Iterator[ASVResult]:
+        self.header = {}
+        deferred = None
+        with open(getstrform(self.path), encoding="utf-8") as fd:
+            scanner = _Scanner(fd, self.chunk_size)
+            for key in scanner.members():
+                if key != "results":
+                    self.header[key] = scanner.value()
+                    continue
+                if not {"params", "env_name", "result_columns"} <= self.header.keys():
+                    # Unusual field order: hold the results until the header is read
+                    deferred = scanner.value()
+                    continue
+                if header_only:
+                    return
+                for name in scanner.members():
+                    record = self._record(name, scanner.value())
+                    if record is not None:
+                        yield record
+        self._check_version()
+        if deferred is not None and not header_only:
+            for name, values in deferred.items():
+                record = self._record(name, values)
+                if record is not None:
+                    yield record
+
+    def _check_version(self) -> None:
+        version = self.header.get("version")
+        if version is None:
+            raise ValueError(f"No version specified in {self.path}.")
+        if version != self.api_version:
+            raise ValueError(
+                f"{self.path} is stored in format version {version}, "
+                f"expected {self.api_version}."
+            )
+
+    def _record(self, name: str, values: list) -> ASVResult | None:
+        row = dict(zip(self.header["result_columns"], values))
+        params = row.get("params") or []
+        if self.bench and not self.bench.select(name, params):
+            return None
+        n_comb = math.prod(len(p) for p in params)
+
+        stats = None
+        for column, column_values in row.items():
+            if not column.startswith("stats_") or column_values is None:
+                continue
+            if stats is None:
+                stats = [{} for _ in column_values]
+            for entry, value in zip(stats, column_values):
+                if value is not None:
+                    entry[column[6:]] = value
+
+        return ASVResult(
+            name,
+            params,
+            _per_param(row.get("result"), n_comb),
+            _per_param(stats, n_comb),
+            _per_param(row.get("samples") if self.samples else None, n_comb),
+            row.get("version"),
+            self.machine,
+            self.env_name,
+        )
@@ -2,16 +2,15 @@
 
 from __future__ import annotations
 
+import json
+import math
 from dataclasses import dataclass
 from enum import Enum
 from typing import Callable
 
-from asv.commands.compare import (  # type: ignore[import-untyped]
-    _is_result_better,
-    _isna,
-)
+import polars as pl
 
-from asv_spyglass.results import ASVBench
+from asv_spyglass.results import STATS_FIELDS, ASVBench
 
 
 class ResultColor(str, Enum):
@@ -56,6 +55,12 @@ class ASVChangeInfo:
         return self.color == ResultColor.RED
 
 
+def _isna(value) -> bool:
+    # Same as asv's ``_isna``, without importing asv on every call:
+    # None (failed) or NaN (skipped)
+    return value is None or value != value
+
+
 _ChangeEntry = tuple[
     Callable[[ASVBench, ASVBench, float, bool], bool],
     ASVChangeInfo,
@@ -112,6 +117,36 @@ CHANGE_INFO: dict[str, _ChangeEntry] = {
 }
 
 
+IMPROVED_INFO = ASVChangeInfo(
+    ResultColor.GREEN,
+    ResultMark.IMPROVED,
+    AfterIs.BETTER,
+    row_style="green",
+)
+WORSENED_INFO = ASVChangeInfo(
+    ResultColor.RED,
+    ResultMark.WORSENED,
+    AfterIs.WORSE,
+    row_style="red",
+)
+UNCHANGED_INFO = ASVChangeInfo(
+    ResultColor.DEFAULT,
+    ResultMark.NONE,
+    AfterIs.SAME,
+)
+
+# Every classification outcome is determined by its ``AfterIs`` value.
+AFTER_IS_INFO: dict[AfterIs, ASVChangeInfo] = {
+    info.after_is: info
+    for info in [
+        *(info for _, info in CHANGE_INFO.values()),
+        IMPROVED_INFO,
+        WORSENED_INFO,
+        UNCHANGED_INFO,
+    ]
+}
+
+
 def get_change_info(
     asv1: ASVBench,
     asv2: ASVBench,
@@ -119,6 +154,8 @@ def get_change_info(
     use_stats: bool,
 ) -> ASVChangeInfo:
     """Classify the change between two benchmark results."""
+    from asv.commands.compare import _is_result_better  # type: ignore[import-untyped]
+
     for _key, (predicate, info) in CHANGE_INFO.items():
         if predicate(asv1, asv2, factor, use_stats):
             return info
@@ -131,12 +168,7 @@ def get_change_info(
         factor,
         use_stats=use_stats,
     ):
-        return ASVChangeInfo(
-            ResultColor.GREEN,
-            ResultMark.IMPROVED,
-            AfterIs.BETTER,
-            row_style="green",
-        )
+        return IMPROVED_INFO
 
     if _is_result_better(
         asv1.time,
@@ -146,15 +178,244 @@ def get_change_info(
         factor,
         use_stats=use_stats,
     ):
-        return ASVChangeInfo(
-            ResultColor.RED,
-            ResultMark.WORSENED,
-            AfterIs.WORSE,
-            row_style="red",
+        return WORSENED_INFO
+
+    return UNCHANGED_INFO
+
+
+# Ways of deciding whether the stats of two results rule out a difference:
+# asv's own check, or an opt-in test on the raw samples where both have them
+SIGNIFICANCE_METHODS = ("asv", "mann-whitney", "bootstrap")
+
+
+def _significance(
+    joined: pl.DataFrame,
+    factor: float,
+    use_stats: bool,
+    method: str = "asv",
+    seed: int = 0,
+) -> pl.DataFrame:
+    """Batched form of the statistics check in asv's ``_is_result_better``.
+
+    ``_significant`` is true where the stats do not rule out a difference.
+    With the ``asv`` method, rows carrying raw samples on both sides go
+    through asv's own ``is_different`` (Mann-Whitney U), but only when the
+    factor test would flag them either way; all other rows use the
+    confidence-interval overlap test as column expressions.
+
+    The ``mann-whitney`` and ``bootstrap`` methods instead test every row
+    with samples on both sides at once, see ``asv_spyglass._significance``,
+    and add a ``p_value`` or ``ratio_ci_low``/``ratio_ci_high`` column.
+    Rows with too few samples for the test keep the interval check.
+    """
+    if method not in SIGNIFICANCE_METHODS:
+        raise ValueError(f"Unknown significance method: {method!r}")
+    if not use_stats:
+        return pl.DataFrame({"_significant": [True] * joined.height})
+
+    def usable(suffix):
+        return (
+            pl.col(f"present{suffix}")
+            & pl.col(f"has_stats{suffix}")
+            & (pl.col(f"repeat{suffix}").fill_null(0) != 1)
         )
 
-    return ASVChangeInfo(
-        ResultColor.DEFAULT,
-        ResultMark.NONE,
-        AfterIs.SAME,
+    t1, t2 = pl.col("result_1"), pl.col("result_2")
+    checked = usable("_1") & usable("_2")
+    overlap = (pl.col("ci_99_b_1") >= pl.col("ci_99_a_2")) & (
+        pl.col("ci_99_a_1") <= pl.col("ci_99_b_2")
+    )
+    with_samples = (
+        checked & pl.col("samples_1").is_not_null() & pl.col("samples_2").is_not_null()
+    )
+    if method == "asv":
+        with_samples = with_samples & ((t1 < t2 / factor) | (t2 < t1 / factor))
+    frame = joined.select(
+        significant=(~checked | ~overlap).fill_null(True),
+        with_samples=with_samples.fill_null(False),
+    )
+    significant = frame["significant"]
+    rows = frame["with_samples"].arg_true()
+    subset = joined[rows]
+
+    if method == "asv":
+        if rows.len():
+            from asv import _stats  # type: ignore[import-untyped]
+
+            stats = [
+                subset.select(
+                    pl.struct(*(pl.col(f"{f}{suffix}").alias(f) for f in STATS_FIELDS))
+                ).to_series()
+                for suffix in ("_1", "_2")
+            ]
+            tested = [
+                _stats.is_different(s1, s2, st1, st2)
+                for s1, s2, st1, st2 in zip(
+                    subset["samples_1"], subset["samples_2"], *stats
+                )
+            ]
+            significant = significant.scatter(rows, tested)
+        return pl.DataFrame({"_significant": significant})
+
+    from asv_spyglass._significance import (
+        MANN_WHITNEY_THRESHOLD,
+        bootstrap_ratio,
+        mann_whitney,
     )
+
+    samples = (subset["samples_1"].to_list(), subset["samples_2"].to_list())
+    if method == "mann-whitney":
+        p_value, trusted = mann_whitney(*samples)
+        tested = p_value < MANN_WHITNEY_THRESHOLD
+        extra = {"p_value": p_value}
+    else:
+        low, high, trusted = bootstrap_ratio(*samples, seed=seed)
+        tested = (low > 1) | (high < 1)
+        extra = {"ratio_ci_low": low, "ratio_ci_high": high}
+    decided = rows.to_numpy()[trusted]
+    if len(decided):
+        significant = significant.scatter(decided, tested[trusted])
+    columns = {"_significant": significant}
+    for name, values in extra.items():
+        column = pl.Series(name, [None] * joined.height, dtype=pl.Float64)
+        columns[name] = column.scatter(rows, values) if rows.len() else column
+    return pl.DataFrame(columns)
+
+
+def classify_changes(
+    joined: pl.DataFrame,
+    factor: float,
+    use_stats: bool = True,
+    significance: str = "asv",
+    seed: int = 0,
+) -> pl.DataFrame:
+    """Vectorized ``get_change_info`` over a ``join_prepared`` frame.
+
+    Adds ``after_is`` (an ``AfterIs`` value), ``ratio`` (after/before, NaN or
+    inf when not comparable), ``ratio_na``, ``significant`` (whether the
+    statistics allow for a difference) and ``insignificant`` columns; the
+    latter marks unchanged results that would pass the factor test without
+    statistics, which are displayed with a ``~`` prefix.
+
+    ``significance`` is one of ``SIGNIFICANCE_METHODS``; the sample-based
+    tests add their statistics as columns, and are seeded by ``seed``.
+    """
+    t1, t2 = pl.col("result_1"), pl.col("result_2")
+    v1, v2 = pl.col("version_1"), pl.col("version_2")
+    significant = pl.col("_significant")
+
+    def lit(after_is: AfterIs) -> pl.Expr:
+        return pl.lit(after_is.value)
+
+    after_is = (
+        pl.when(v1.is_not_null() & v2.is_not_null() & (v1 != v2))
+        .then(lit(AfterIs.INCOMPARABLE))
+        .when(t1.is_not_null() & t2.is_null())
+        .then(lit(AfterIs.FAILED))
+        .when(t1.is_null() & t2.is_not_null())
+        .then(lit(AfterIs.FIXED))
+        .when(t1.is_null() | t1.is_nan() | t2.is_nan())
+        .then(lit(AfterIs.SAME))
+        .when(significant & (t2 < t1 / factor))
+        .then(lit(AfterIs.BETTER))
+        .when(significant & (t1 < t2 / factor))
+        .then(lit(AfterIs.WORSE))
+        .otherwise(lit(AfterIs.SAME))
+    )
+    ratio = (
+        pl.when(t1.is_null() | t2.is_null() | t1.is_nan() | t2.is_nan())
+        .then(math.nan)
+        .when(t1 == 0)
+        .then(math.inf)
+        .otherwise(t2 / t1)
+    )
+    return (
+        joined.with_columns(
+            *_significance(joined, factor, use_stats, significance, seed),
+            ratio=ratio,
+        )
+        .with_columns(
+            after_is=after_is,
+            ratio_na=pl.col("ratio").is_nan() | pl.col("ratio").is_infinite(),
+        )
+        .with_columns(
+            insignificant=(
+                (pl.col("after_is") == AfterIs.SAME.value)
+                & ~pl.col("ratio_na")
+                & ((t1 < t2 / factor) | (t2 < t1 / factor))
+            ),
+        )
+        .rename({"_significant": "significant"})
+    )
+
+
+# Bump whenever the classification of a row can change for the same inputs
+FINGERPRINT_VERSION = 1
+# Columns ``classify_changes`` adds, reused as is for unchanged rows
+CLASSIFIED_COLUMNS = [
+    "significant",
+    "ratio",
+    "after_is",
+    "ratio_na",
+    "insignificant",
+    "p_value",
+    "ratio_ci_low",
+    "ratio_ci_high",
+]
+
+
+def fingerprint(
+    joined: pl.DataFrame,
+    factor: float,
+    use_stats: bool = True,
+    significance: str = "asv",
+    seed: int = 0,
+) -> pl.Series:
+    """Hash of every input to the classification of each row of ``joined``.
+
+    Covers the row's values, statistics, samples and versions on both
+    sides, and the classification settings. Polars does not promise stable
+    hashes across releases, so its version is part of the settings.
+    """
+    settings = json.dumps(
+        [FINGERPRINT_VERSION, pl.__version__, factor, use_stats, significance, seed]
+    )
+    return joined.select(
+        fingerprint=pl.struct(pl.all(), _settings=pl.lit(settings)).hash(seed=0)
+    ).to_series()
+
+
+def classify_changes_incremental(
+    joined: pl.DataFrame,
+    previous: pl.DataFrame | None,
+    factor: float,
+    use_stats: bool = True,
+    significance: str = "asv",
+    seed: int = 0,
+) -> pl.DataFrame:
+    """``classify_changes``, reusing rows classified by an earlier run.
+
+    ``previous`` is an earlier result of this function (any subset of its
+    columns, as long as it has ``name``, ``fingerprint`` and the
+    classification columns). Rows whose ``fingerprint`` is unchanged take
+    its classification and any extra columns (such as formatted output);
+    only the rest are classified. With the ``bootstrap`` method, a row is
+    then resampled together with fewer others, so its confidence interval
+    may differ from a full run by resampling noise.
+
+    Adds a ``fingerprint`` column and keeps the row order of ``joined``.
+    """
+    joined = joined.with_columns(
+        fingerprint=fingerprint(joined, factor, use_stats, significance, seed)
+    )
+    if previous is None:
+        return classify_changes(joined, factor, use_stats, significance, seed)
+
+    known = previous.select(pl.exclude(joined.columns), "name", "fingerprint")
+    joined = joined.with_row_index("_row")
+    reused = joined.join(known, on=["name", "fingerprint"], how="inner")
+    stale = joined.join(known, on=["name", "fingerprint"], how="anti")
+    if stale.is_empty():
+        return reused.sort("_row").drop("_row")
+    fresh = classify_changes(stale, factor, use_stats, significance, seed)
+    return pl.concat([reused, fresh], how="diagonal_relaxed").sort("_row").drop("_row")
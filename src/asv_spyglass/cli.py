@@ -1,13 +1,12 @@
 import sys
 from pathlib import Path
+from urllib.parse import quote
 
 import click
-import polars as pl
 import rich_click
-from asv import results
 
-from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
-from asv_spyglass.compare import ResultPreparer, do_compare, do_compare_many
+# Everything else (polars, asv, tabulate, ...) is imported by the commands
+# which need it, to keep startup fast for --help and small comparisons.
 
 rich_click.rich_click.USE_RICH_MARKUP = True
 rich_click.rich_click.SHOW_ARGUMENTS = True
@@ -24,10 +23,81 @@ def _resolve_bconf(result_path: str, bconf: str | None) -> str | None:
     return None
 
 
+def _result_cache(no_cache: bool):
+    from asv_spyglass._cache import MemoryCache, ResultCache
+
+    if no_cache:
+        return None
+    # Commands run by ``serve`` share its cache, see asv_spyglass.serve
+    ctx = click.get_current_context(silent=True)
+    resident = ctx.find_object(MemoryCache) if ctx is not None else None
+    return resident if resident is not None else ResultCache()
+
+
+def _benchmarks(bconf: str | None, no_cache: bool, bench: tuple[str, ...] = ()):
+    """Memoized benchmarks.json metadata, compiled into the cache unless no_cache.
+
+    Only benchmarks matching one of the ``bench`` regexes are selected.
+    """
+    from asv_spyglass._asv_ro import load_benchmarks
+
+    cache = _result_cache(no_cache)
+    return load_benchmarks(
+        Path(bconf) if bconf else None,
+        regex=list(bench),
+        cache_dir=cache.directory if cache is not None else None,
+    )
+
+
+def _echo_df(df) -> None:
+    import polars as pl
+
+    with pl.Config(
+        tbl_formatting="ASCII_MARKDOWN",
+        tbl_hide_column_data_types=True,
+        fmt_str_lengths=50,
+        tbl_cols=50,
+    ):
+        click.echo(df)
+
+
+def _start_profile(ctx: click.Context, fmt: str) -> None:
+    """Record the phases of the command, reported on stderr once it ends."""
+    from asv_spyglass.profiling import Profiler
+
+    profiler = Profiler()
+
+    def report():
+        if fmt == "json":
+            import json
+
+            click.echo(json.dumps(profiler.to_records(), indent=2), err=True)
+        else:
+            click.echo(profiler.format_table(), err=True)
+
+    # Close callbacks run last to first, so the profiler stops before reporting
+    ctx.call_on_close(report)
+    ctx.with_resource(profiler)
+
+
 @click.group(cls=rich_click.RichGroup)
-def cli():
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Report time, CPU time, peak memory and items per phase on stderr.",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    show_default=True,
+    help="Format of the --profile report.",
+)
+@click.pass_context
+def cli(ctx, profile, profile_format):
     """ASV benchmark analysis tool."""
-    pass
+    if profile:
+        _start_profile(ctx, profile_format)
 
 
 @cli.command(cls=rich_click.RichCommand)
@@ -82,6 +152,54 @@ def cli():
     is_flag=True,
     help="Only show regressed benchmarks.",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always re-parse result files instead of using the on-disk cache.",
+)
+@click.option(
+    "--significance",
+    type=click.Choice(["asv", "mann-whitney", "bootstrap"]),
+    default="asv",
+    show_default=True,
+    help="Test deciding significance where raw samples exist (others need NumPy).",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Random seed for the bootstrap significance test.",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["table", "json", "ndjson"]),
+    default="table",
+    show_default=True,
+    help="Output a table, a JSON array, or one JSON record per line.",
+)
+@click.option(
+    "--state",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="File of the previous comparison's results; only changed rows are redone.",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Only show the N largest regressions and N largest improvements by ratio,"
+        " besides failed and fixed benchmarks."
+    ),
+)
+@click.option(
+    "--bench",
+    "-b",
+    multiple=True,
+    help="Only include benchmarks whose name matches this regex (repeatable).",
+)
 def compare(
     b1,
     b2,
@@ -95,6 +213,13 @@ def compare(
     no_env_label,
     only_improved,
     only_regressed,
+    no_cache,
+    significance,
+    seed,
+    fmt,
+    state,
+    top,
+    bench,
 ):
     """Compare two ASV result files.
 
@@ -108,6 +233,50 @@ def compare(
             "--only-improved and --only-regressed are mutually exclusive."
         )
     bconf = _resolve_bconf(b1, bconf)
+    kwargs = dict(
+        label_before=label_before,
+        label_after=label_after,
+        only_improved=only_improved,
+        only_regressed=only_regressed,
+        cache=_result_cache(no_cache),
+        significance=significance,
+        seed=seed,
+        bench=list(bench),
+    )
+    if state is not None:
+        from asv_spyglass._cache import ComparisonState
+
+        kwargs["state"] = ComparisonState(state)
+
+    if fmt != "table":
+        from asv_spyglass.compare import compare_records, write_records
+
+        records, worsened, _ = compare_records(
+            b1, b2, bconf, factor, only_changed, sort, top=top, **kwargs
+        )
+        write_records(records, fmt, sys.stdout)
+        if worsened:
+            sys.exit(1)
+        return
+
+    if not split and sort == "default" and top is None:
+        from asv_spyglass.compare import stream_compare
+
+        worsened, _ = stream_compare(
+            b1,
+            b2,
+            bconf,
+            sys.stdout,
+            factor,
+            only_changed,
+            no_env_label=no_env_label,
+            **kwargs,
+        )
+        if worsened:
+            sys.exit(1)
+        return
+
+    from asv_spyglass.compare import do_compare
 
     output, worsened, _ = do_compare(
         b1,
@@ -117,11 +286,9 @@ def compare(
         split,
         only_changed,
         sort,
-        label_before=label_before,
-        label_after=label_after,
         no_env_label=no_env_label,
-        only_improved=only_improved,
-        only_regressed=only_regressed,
+        top=top,
+        **kwargs,
     )
     print(output)
     if worsened:
@@ -156,7 +323,59 @@ def compare(
     multiple=True,
     help="Custom labels for the environments (baseline first).",
 )
-def compare_many(baseline, contenders, bconf, factor, sort, label):
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Processes used to load result files (0 for one per CPU).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always re-parse result files instead of using the on-disk cache.",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["table", "json", "ndjson"]),
+    default="table",
+    show_default=True,
+    help="Output a table, a JSON array, or one JSON record per line.",
+)
+@click.option(
+    "--summary",
+    is_flag=True,
+    help="Only show per-contender counts, geometric mean ratio and worst ratios.",
+)
+@click.option(
+    "--worst",
+    type=click.IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="Benchmarks with the highest ratios listed per contender by --summary.",
+)
+@click.option(
+    "--bench",
+    "-b",
+    multiple=True,
+    help="Only include benchmarks whose name matches this regex (repeatable).",
+)
+def compare_many(
+    baseline,
+    contenders,
+    bconf,
+    factor,
+    sort,
+    label,
+    jobs,
+    no_cache,
+    fmt,
+    summary,
+    worst,
+    bench,
+):
     """Compare multiple ASV result files against a baseline.
 
     BASELINE is the result JSON file to compare against.
@@ -169,51 +388,389 @@ def compare_many(baseline, contenders, bconf, factor, sort, label):
         else:
             bconf = None
 
+    from asv_spyglass.compare import (
+        compare_many_records,
+        compare_many_summary,
+        do_compare_many,
+        format_many_summary,
+        write_records,
+    )
+
     labels = list(label) if label else None
+    kwargs = dict(
+        labels=labels, jobs=jobs, cache=_result_cache(no_cache), bench=list(bench)
+    )
 
-    output = do_compare_many(
-        baseline,
-        list(contenders),
-        bconf,
+    try:
+        if summary:
+            output = compare_many_summary(
+                baseline, list(contenders), bconf, factor, worst=worst, **kwargs
+            )
+            if fmt == "table":
+                output = format_many_summary(output)
+        elif fmt == "table":
+            output = do_compare_many(
+                baseline, list(contenders), bconf, factor, sort, **kwargs
+            )
+        else:
+            output = compare_many_records(
+                baseline, list(contenders), bconf, factor, sort, **kwargs
+            )
+        if fmt != "table":
+            write_records(output, fmt, sys.stdout)
+            return
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    print(output)
+
+
+@cli.command(cls=rich_click.RichCommand)
+@click.argument("results_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("before")
+@click.argument("after")
+@click.option(
+    "--after-dir",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    help="Results directory holding AFTER, if not RESULTS_DIR.",
+)
+@click.option(
+    "--bconf",
+    type=click.Path(exists=True),
+    required=False,
+    help="Path to benchmarks.json (default: the one in RESULTS_DIR, if any).",
+)
+@click.option(
+    "--factor",
+    default=1.1,
+    show_default=True,
+    help="Factor for determining significant changes.",
+)
+@click.option(
+    "--only-changed",
+    is_flag=True,
+    help="Only show changed benchmarks.",
+)
+@click.option(
+    "--only-improved",
+    is_flag=True,
+    help="Only show improved benchmarks.",
+)
+@click.option(
+    "--only-regressed",
+    is_flag=True,
+    help="Only show regressed benchmarks.",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["default", "ratio", "name"]),
+    default="default",
+    show_default=True,
+    help="Sort output by change, ratio, or name.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Processes comparing pairs of files (0 for one per CPU).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always re-parse result files instead of using the on-disk cache.",
+)
+@click.option(
+    "--bench",
+    "-b",
+    multiple=True,
+    help="Only include benchmarks whose name matches this regex (repeatable).",
+)
+def compare_tree(
+    results_dir,
+    before,
+    after,
+    after_dir,
+    bconf,
+    factor,
+    only_changed,
+    only_improved,
+    only_regressed,
+    sort,
+    jobs,
+    no_cache,
+    bench,
+):
+    """Compare every machine/env of an ASV results directory between commits.
+
+    RESULTS_DIR is the ASV results directory, holding one sub-directory of
+    result JSON files per machine.
+    BEFORE and AFTER are commit hashes, or prefixes of them. Each result
+    file of BEFORE is compared against the file of AFTER for the same
+    machine and environment, with benchmarks.json read once for all of
+    them. Exits with code 1 if any pair has regressions or fails to compare.
+    """
+    if only_improved and only_regressed:
+        raise click.UsageError(
+            "--only-improved and --only-regressed are mutually exclusive."
+        )
+    from asv_spyglass.compare import ResultPreparer
+    from asv_spyglass.tree import compare_tree, format_tree_report, pair_result_files
+
+    if not bconf and (Path(results_dir) / "benchmarks.json").exists():
+        bconf = str(Path(results_dir) / "benchmarks.json")
+    preparer = ResultPreparer(_benchmarks(bconf, no_cache, bench))
+
+    try:
+        pairs = pair_result_files(
+            Path(results_dir), before, Path(after_dir or results_dir), after
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    if not pairs:
+        raise click.ClickException(
+            f"No result files for {before!r} or {after!r} in {results_dir}."
+        )
+    reports = compare_tree(
+        pairs,
+        preparer,
+        jobs=jobs,
+        cache=_result_cache(no_cache),
         factor=factor,
+        only_changed=only_changed,
         sort=sort,
-        labels=labels,
+        only_improved=only_improved,
+        only_regressed=only_regressed,
     )
-    print(output)
+    print(format_tree_report(reports))
+    if any(r.worsened or r.error is not None for r in reports):
+        sys.exit(1)
 
 
 @cli.command(cls=rich_click.RichCommand)
-@click.argument("bres", type=click.Path(exists=True), required=True)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Listen on this Unix socket instead of on localhost.",
+)
+@click.option(
+    "--port",
+    type=click.IntRange(0, 65535),
+    default=8470,
+    show_default=True,
+    help="Port to listen on at 127.0.0.1 (0 for any free one).",
+)
+@click.option(
+    "--max-results",
+    type=click.IntRange(min=1),
+    default=64,
+    show_default=True,
+    help="Prepared result files kept in memory.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or fill the on-disk cache, only the one in memory.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    help="Log every request on stderr.",
+)
+def serve(socket_path, port, max_results, no_cache, verbose):
+    """Answer compare and compare-many requests from a resident process.
+
+    Requests are POSTed as JSON to /run, e.g. {"command": "compare",
+    "args": ["B1", "B2"]}, and answered with the exit code, stdout and
+    stderr the same command would have given. Prepared result files and
+    benchmarks.json metadata stay in memory until they change on disk.
+    Relative paths are resolved from the directory the server runs in.
+    """
+    import signal
+
+    from asv_spyglass._cache import MemoryCache, ResultCache
+    from asv_spyglass.serve import make_server
+
+    cache = MemoryCache(None if no_cache else ResultCache(), max_results)
+    server = make_server(cache, socket_path, port, verbose)
+    if socket_path is None:
+        host, port = server.server_address[:2]
+        click.echo(f"Serving on http://{host}:{port}", err=True)
+    else:
+        click.echo(f"Serving on {socket_path}", err=True)
+    # Stop as on Ctrl-C when terminated, so the socket is removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            Path(socket_path).unlink(missing_ok=True)
+
+
+def _partition_path(directory: str, prepared, source: str, suffix: str) -> Path:
+    """``directory/machine=<machine>/env=<env>/<source stem><suffix>``."""
+    path = (
+        Path(directory)
+        / f"machine={quote(prepared.machine_name, safe='')}"
+        / f"env={quote(prepared.env_name, safe='')}"
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path / f"{Path(source).stem}{suffix}"
+
+
+@cli.command(cls=rich_click.RichCommand)
+@click.argument("bres", type=click.Path(exists=True), required=True, nargs=-1)
+@click.option(
+    "--bconf",
+    type=click.Path(exists=True),
+    required=False,
+    help="Path to benchmarks.json",
+)
+@click.option(
+    "--csv",
+    type=click.Path(),
+    help="Save data to csv",
+)
+@click.option(
+    "--parquet",
+    type=click.Path(file_okay=False),
+    help="Save data as a Parquet dataset in this directory.",
+)
+@click.option(
+    "--arrow",
+    type=click.Path(file_okay=False),
+    help="Save data as an Arrow IPC dataset in this directory.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always re-parse result files instead of using the on-disk cache.",
+)
+@click.option(
+    "--bench",
+    "-b",
+    multiple=True,
+    help="Only include benchmarks whose name matches this regex (repeatable).",
+)
+def to_df(bres, bconf, csv, parquet, arrow, no_cache, bench):
+    """Generate a dataframe from ASV result files.
+
+    BRES are paths to ASV result JSON files. For backwards compatibility, a
+    trailing benchmarks.json metadata file (under any name) is taken as such.
+    If no benchmarks.json is given, it is searched for in the parent
+    directory of the first result file.
+    If still not found, results are displayed without extra metadata (units, etc).
+
+    With --parquet or --arrow, every result file is written as it is read,
+    to DIR/machine=<machine>/env=<env>/<result file name>, so the output is
+    a hive-partitioned dataset. These files can be passed to compare.
+    """
+    import polars as pl
+
+    from asv_spyglass._stream import is_benchmarks_file
+    from asv_spyglass.compare import ResultPreparer, load_prepared
+
+    bres = list(bres)
+    if len(bres) > 1 and is_benchmarks_file(bres[-1]):
+        trailing = bres.pop()
+        if bconf and Path(bconf).resolve() != Path(trailing).resolve():
+            raise click.UsageError(
+                f"{trailing} is a benchmarks.json file, but --bconf is {bconf}."
+            )
+        bconf = trailing
+    bconf = _resolve_bconf(bres[0], bconf)
+    preparer = ResultPreparer(_benchmarks(bconf, no_cache, bench))
+    cache = _result_cache(no_cache)
+    frames = []
+    for path in bres:
+        try:
+            prepared = load_prepared(path, preparer, cache)
+        except Exception as exc:
+            raise click.ClickException(f"Error loading {path}: {exc}") from exc
+        if parquet:
+            prepared.write_export(_partition_path(parquet, prepared, path, ".parquet"))
+        if arrow:
+            prepared.write_export(_partition_path(arrow, prepared, path, ".arrow"))
+        if csv or not (parquet or arrow):
+            frames.append(prepared.to_df())
+    if not frames:
+        return
+    df = pl.concat(frames, how="diagonal_relaxed")
+    if csv:
+        df.write_csv(csv)
+    else:
+        _echo_df(df)
+
+
+@cli.command(cls=rich_click.RichCommand)
+@click.argument(
+    "results_dir", type=click.Path(exists=True, file_okay=False), required=True
+)
 @click.argument("bdat", type=click.Path(exists=True), required=False)
 @click.option(
     "--csv",
     type=click.Path(),
     help="Save data to csv",
 )
-def to_df(bres, bdat, csv):
-    """Generate a dataframe from an ASV result file.
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Processes used to read new result files (0 for one per CPU).",
+)
+@click.option(
+    "--store",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory for the history store (default: in the cache directory).",
+)
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Re-read every result file instead of only new or changed ones.",
+)
+@click.option(
+    "--bench",
+    "-b",
+    multiple=True,
+    help="Only include benchmarks whose name matches this regex (repeatable).",
+)
+def history(results_dir, bdat, csv, jobs, store, rebuild, bench):
+    """Tabulate every result file under an ASV results directory.
 
-    BRES is the path to an ASV result JSON file.
+    RESULTS_DIR is the ASV results directory, holding one sub-directory of
+    result JSON files per machine.
     BDAT is an optional path to the benchmarks.json metadata file.
-    If BDAT is not provided, it is searched for in the parent directory of BRES.
-    If still not found, results are displayed without extra metadata (units, etc).
+    If BDAT is not provided, it is looked for in RESULTS_DIR.
+    Parsed results are kept in a store, so later runs only read new or
+    changed files.
     """
-    res = results.Results.load(bres)
-    bdat = _resolve_bconf(bres, bdat)
-    bdat_path = Path(bdat) if bdat else None
-    benchdat = ReadOnlyASVBenchmarks(bdat_path).benchmarks
-    preparer = ResultPreparer(benchdat)
-    df = preparer.prepare(res).to_df()
+    from asv_spyglass.compare import ResultPreparer
+    from asv_spyglass.history import ResultHistory
+
+    if not bdat and (Path(results_dir) / "benchmarks.json").exists():
+        bdat = str(Path(results_dir) / "benchmarks.json")
+    results = ResultHistory(
+        Path(results_dir),
+        ResultPreparer(_benchmarks(bdat, no_cache=False, bench=bench)),
+        Path(store) if store else None,
+    )
+    update = results.update(jobs=jobs, rebuild=rebuild)
+    for error in update.errors:
+        click.echo(f"Skipped {error}", err=True)
+    df = results.to_df()
     if csv:
         df.write_csv(csv)
     else:
-        with pl.Config(
-            tbl_formatting="ASCII_MARKDOWN",
-            tbl_hide_column_data_types=True,
-            fmt_str_lengths=50,
-            tbl_cols=50,
-        ):
-            click.echo(df)
+        _echo_df(df)
 
 
 if __name__ == "__main__":
@@ -1,44 +1,125 @@
 from __future__ import annotations
 
+import dataclasses
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TextIO
 
-import tabulate
-from asv import results  # type: ignore[import-untyped]
-from asv.commands.compare import (  # type: ignore[import-untyped]
-    _is_result_better,
-    unroll_result,
-)
-from asv.console import log  # type: ignore[import-untyped]
-from asv.util import human_value  # type: ignore[import-untyped]
-from asv_runner.console import color_print  # type: ignore[import-untyped]
+import polars as pl
 
-from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
-from asv_spyglass._num import Ratio
-from asv_spyglass.changes import get_change_info
-from asv_spyglass.results import ASVBench, PreparedResult, result_iter
+from asv_spyglass._asv_ro import (
+    BenchmarkFilter,
+    BenchmarkIndex,
+    ReadOnlyASVBenchmarks,
+    _as_list,
+    build_base_index,
+    expanded_name,
+    load_benchmarks,
+    param_values,
+)
+from asv_spyglass._cache import ComparisonState, ResultCache
+from asv_spyglass._stream import ResultStream
+from asv_spyglass.changes import (
+    AFTER_IS_INFO,
+    CLASSIFIED_COLUMNS,
+    AfterIs,
+    ASVChangeInfo,
+    ResultMark,
+    classify_changes,
+    classify_changes_incremental,
+)
+from asv_spyglass.profiling import phase
+from asv_spyglass.results import (
+    EXPORT_SUFFIXES,
+    PREPARED_SCHEMA,
+    STATS_FIELDS,
+    PreparedResult,
+    SamplesColumn,
+    join_prepared,
+    result_iter,
+)
 
 
 def human_value_fallback(value, unit, err=None):
     """Fallback for human_value when units are missing."""
+    if value is None:
+        return "failed"
     if unit:
+        from asv.util import human_value  # type: ignore[import-untyped]
+
         return human_value(value, unit, err=err)
     if err:
         return f"{value:.3g}±{err:.1g}"
     return f"{value:.3g}"
 
 
+def _format_ratio(ratio: float, is_na: bool, insignificant: bool) -> str:
+    """Format a ratio for display, as ``Ratio.__repr__`` does for ``~`` ratios."""
+    if is_na:
+        return "n/a"
+    if insignificant:
+        return f"~{ratio:.2f}"
+    return f"{ratio:6.2f}"
+
+
 class ResultPreparer:
-    """Prepares benchmark results for comparison."""
+    """Prepares benchmark results for comparison.
+
+    ``benchmarks`` is either a ``ReadOnlyASVBenchmarks`` instance (or its
+    ``BenchmarkIndex``), whose prebuilt base-name index is reused, or a
+    mapping of (expanded) benchmark names to their metadata.
 
-    def __init__(self, benchmarks):
-        self.benchmarks = benchmarks
+    Only benchmarks whose expanded names match one of the ``regex``
+    patterns are prepared, by default those ``benchmarks`` were loaded
+    with. Other result keys are skipped before they are unrolled.
+    """
+
+    def __init__(self, benchmarks, regex: str | list[str] | None = None):
+        if isinstance(benchmarks, ReadOnlyASVBenchmarks):
+            self.benchmarks = benchmarks.benchmarks
+            self._index = benchmarks.base_index
+            self.identity = benchmarks.identity
+            if regex is None:
+                regex = benchmarks.regex
+            elif _as_list(regex) != benchmarks.regex:
+                self.identity = (benchmarks.identity, tuple(_as_list(regex)))
+        elif isinstance(benchmarks, BenchmarkIndex):
+            self.benchmarks = benchmarks
+            self._index = benchmarks.base_index
+            self.identity = None  # Origin unknown, never cached
+        else:
+            self.benchmarks = benchmarks
+            self._index = build_base_index(benchmarks)
+            self.identity = None  # Arbitrary metadata, never cached
+        self.bench = BenchmarkFilter(_as_list(regex))
+
+    def stream(self, path, samples: bool = True) -> ResultStream:
+        """Stream the benchmarks of the result file at ``path`` to prepare."""
+        return ResultStream(path, samples=samples, bench=self.bench)
+
+    def select(self, prepared: PreparedResult) -> PreparedResult:
+        """The rows of an already prepared result which ``regex`` selects."""
+        if not self.bench:
+            return prepared
+        names = prepared.frame["name"].unique().to_list()
+        selected = [name for name in names if self.bench.search(name)]
+        return dataclasses.replace(
+            prepared, frame=prepared.frame.filter(pl.col("name").is_in(selected))
+        )
 
     def prepare(self, result_data) -> PreparedResult:
-        units = {}
-        result_vals = {}
-        ss = {}
-        versions = {}
-        param_names = {}
+        from asv.commands.compare import unroll_result  # type: ignore[import-untyped]
+
+        columns = {key: [] for key in PREPARED_SCHEMA if key not in ("machine", "env")}
+        columns["samples"] = SamplesColumn()
+        param_columns: dict[str, list] = {}
         machine_env_name = None
 
         for (
@@ -50,217 +131,759 @@ class ResultPreparer:
             version,
             machine,
             env_name,
-        ) in result_iter(result_data):
+        ) in result_iter(result_data, self.bench):
             machine_env_name = f"{machine}/{env_name}"
-            for name, value, stats, samples in unroll_result(
-                key, params, value, stats, samples
-            ):
-                result_vals[name] = value
-                ss[name] = (stats, samples)
-                versions[name] = version
-                bench_keys = [x for x in self.benchmarks.keys() if key in x]
-                bench_key = bench_keys[0] if bench_keys else key
-                units[name] = self.benchmarks.get(bench_key, {}).get("unit")
-                param_names[name] = self.benchmarks.get(bench_key, {}).get(
-                    "param_names"
+            if self.bench:
+                selection = self.bench.select(key, params)
+                if not selection:
+                    continue
+                unrolled = _unroll_selected(
+                    key, params, selection, value, stats, samples
+                )
+            else:
+                unrolled = zip(
+                    itertools.product(*params),
+                    unroll_result(key, params, value, stats, samples),
                 )
+            meta = self._index.get(key, {})
+            unit = meta.get("unit")
+            pnames = meta.get("param_names")
+            for param_set, (name, value, stats, samples) in unrolled:
+                nrows = len(columns["name"])
+                columns["benchmark_base"].append(key)
+                columns["name"].append(name)
+                columns["result"].append(value)
+                columns["units"].append(unit)
+                columns["version"].append(version)
+                for field in STATS_FIELDS:
+                    columns[field].append(stats.get(field) if stats else None)
+                columns["samples"].append(samples)
+                columns["_param_names"].append(pnames)
+                for pname, pval in zip(pnames or (), param_set):
+                    column = param_columns.setdefault(f"param_{pname}", [])
+                    column.extend([None] * (nrows - len(column)))
+                    column.append(pval)
 
         if machine_env_name is None:
-            raise ValueError("No benchmark results found in the result file")
+            if not self.bench or not hasattr(result_data, "env_name"):
+                raise ValueError("No benchmark results found in the result file")
+            # Every benchmark was filtered out, which leaves an empty result
+            if isinstance(result_data, ResultStream):
+                machine_env_name = f"{result_data.machine}/{result_data.env_name}"
+            else:
+                machine_env_name = (
+                    f"{result_data.params['machine']}/{result_data.env_name}"
+                )
+
+        nrows = len(columns["name"])
+        for column in param_columns.values():
+            column.extend([None] * (nrows - len(column)))
 
+        columns["samples"] = columns["samples"].to_series()
         machine, env_name = machine_env_name.split("/")
-        return PreparedResult(
-            units=units,
-            results=result_vals,
-            stats=ss,
-            versions=versions,
-            machine_name=machine,
-            env_name=env_name,
-            param_names=param_names,
+        return PreparedResult.from_columns(
+            {**columns, **param_columns}, machine_name=machine, env_name=env_name
         )
 
 
-def do_compare(
+def _unroll_selected(
+    key: str, params: list[list[str]], selection, *values
+) -> Iterator[tuple[tuple[str, ...], tuple]]:
+    """Like ``zip(itertools.product(*params), unroll_result(...))``, but only
+    for the combinations at the sorted indices ``selection``.
+    """
+    from asv.commands.compare import unroll_result  # type: ignore[import-untyped]
+
+    n_comb = math.prod(len(p) for p in params)
+    if isinstance(selection, range) and len(selection) == n_comb:
+        yield from zip(itertools.product(*params), unroll_result(key, params, *values))
+        return
+    for idx in selection:
+        yield (
+            param_values(params, idx),
+            (
+                expanded_name(key, params, idx),
+                *(None if column is None else column[idx] for column in values),
+            ),
+        )
+
+
+def _preparer(
+    benchmarks_path: str | Path | None,
+    cache: ResultCache | None,
+    bench: str | list[str] | None = None,
+) -> ResultPreparer:
+    """Preparer for the (memoized) metadata at ``benchmarks_path``.
+
+    Only benchmarks matching the ``bench`` regexes are prepared. With a
+    ``cache``, the metadata's compiled form is kept in its directory.
+    """
+    benchmarks = load_benchmarks(
+        Path(benchmarks_path) if benchmarks_path is not None else None,
+        regex=bench,
+        cache_dir=cache.directory if cache is not None else None,
+    )
+    return ResultPreparer(benchmarks)
+
+
+def load_prepared(
+    path: str,
+    preparer: ResultPreparer,
+    cache: ResultCache | None = None,
+    samples: bool = True,
+) -> PreparedResult:
+    """Load an ASV result file and prepare it for comparison.
+
+    The file is streamed one benchmark at a time, and raw samples are only
+    kept if ``samples`` is true. With a ``cache``, a previously prepared copy
+    of an unchanged file is reused without parsing the JSON at all. Results
+    exported by ``to-df`` as Parquet or Arrow IPC are read back directly.
+    """
+    with phase("load") as handle:
+        prepared = _load_prepared(path, preparer, cache, samples)
+        handle.items = prepared.frame.height
+    return prepared
+
+
+def _load_prepared(
+    path: str, preparer: ResultPreparer, cache: ResultCache | None, samples: bool
+) -> PreparedResult:
+    if Path(path).suffix.lower() in EXPORT_SUFFIXES:
+        return preparer.select(PreparedResult.read_export(path))
+    if cache is not None:
+        prepared = cache.get(path, preparer.identity, samples=samples)
+        if prepared is not None:
+            return prepared
+    prepared = preparer.prepare(preparer.stream(path, samples=samples))
+    if cache is not None:
+        cache.put(path, preparer.identity, prepared, samples=samples)
+    return prepared
+
+
+_worker_state: tuple[ResultPreparer, ResultCache | None] | None = None
+
+
+def _init_worker(preparer: ResultPreparer, cache: ResultCache | None) -> None:
+    global _worker_state
+    _worker_state = (preparer, cache)
+
+
+def _load_prepared_worker(path: str) -> PreparedResult:
+    return load_prepared(path, *_worker_state)
+
+
+def load_prepared_many(
+    paths: list[str],
+    preparer: ResultPreparer,
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+) -> list[PreparedResult]:
+    """Load and prepare several result files, in order, optionally in parallel.
+
+    ``jobs`` is the number of worker processes (0 for one per CPU, 1 to load
+    in this process). Every file is attempted; failures are collected and
+    raised together as a ``ValueError`` naming each offending file.
+    """
+    prepared = []
+    errors = []
+    if jobs == 1 or len(paths) < 2:
+        for path in paths:
+            try:
+                prepared.append(load_prepared(path, preparer, cache))
+            except Exception as exc:
+                errors.append(f"{path}: {exc}")
+    else:
+        # Polars is multithreaded, so use fresh interpreters rather than fork
+        with ProcessPoolExecutor(
+            max_workers=min(jobs or os.cpu_count() or 1, len(paths)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(preparer, cache),
+        ) as pool:
+            futures = [pool.submit(_load_prepared_worker, path) for path in paths]
+            for path, future in zip(paths, futures):
+                try:
+                    prepared.append(future.result())
+                except Exception as exc:
+                    errors.append(f"{path}: {exc}")
+
+    if errors:
+        raise ValueError(
+            "Error loading result files:\n" + "\n".join(f"  {e}" for e in errors)
+        )
+    return prepared
+
+
+def _compare_changes(
+    result_before: str,
+    result_after: str,
+    benchmarks_path: str | Path | None,
+    factor: float,
+    use_stats: bool,
+    cache: ResultCache | None,
+    significance: str,
+    seed: int,
+    only_changed: bool,
+    only_improved: bool,
+    only_regressed: bool,
+    state: ComparisonState | None = None,
+    preparer: ResultPreparer | None = None,
+    top: int | None = None,
+    bench: str | list[str] | None = None,
+):
+    """Classified changes between two result files, filtered for display.
+
+    ``preparer`` prepares both files, instead of one built from the
+    metadata at ``benchmarks_path`` and the ``bench`` regexes. With
+    ``top``, only the largest regressions and improvements are kept, see
+    ``_top_changes``.
+
+    With a ``state``, rows unchanged since the comparison stored there are
+    not classified or formatted again; their table ``cells`` (without the
+    environment suffix) come from the state, which is then updated.
+
+    Returns the changes, the machine/env names of both sides, and whether
+    any benchmark got worse or better (before filtering).
+    """
+    if preparer is None:
+        preparer = _preparer(benchmarks_path, cache, bench)
+
+    prepared_1 = load_prepared(result_before, preparer, cache, samples=use_stats)
+    prepared_2 = load_prepared(result_after, preparer, cache, samples=use_stats)
+
+    mname_1 = f"{prepared_1.machine_name}/{prepared_1.env_name}"
+    mname_2 = f"{prepared_2.machine_name}/{prepared_2.env_name}"
+
+    with phase("join") as handle:
+        joined = join_prepared(prepared_1, prepared_2)
+        handle.items = joined.height
+    with phase("classify", joined.height):
+        changes = classify_changes_incremental(
+            joined,
+            state.load() if state is not None else None,
+            factor,
+            use_stats,
+            significance=significance,
+            seed=seed,
+        )
+    outcomes = [AFTER_IS_INFO[AfterIs(a)] for a in changes["after_is"].unique()]
+    worsened = any(info.is_worsened for info in outcomes)
+    improved = any(info.is_improved for info in outcomes)
+
+    def is_shown(info: ASVChangeInfo) -> bool:
+        if only_changed and info.mark in (ResultMark.NONE, ResultMark.INCOMPARABLE):
+            return False
+        if only_improved and not info.is_improved:
+            return False
+        if only_regressed and not info.is_worsened:
+            return False
+        return True
+
+    shown = [a.value for a, info in AFTER_IS_INFO.items() if is_shown(info)]
+    classified = changes
+    changes = changes.filter(pl.col("after_is").is_in(shown))
+    if top is not None:
+        changes = _top_changes(changes, top)
+    params = _params_frame(prepared_1, prepared_2)
+    changes = changes.join(params, on="name", how="left", maintain_order="left")
+    if state is not None:
+        if "cells" not in changes.columns:
+            changes = changes.with_columns(cells=pl.lit(None, dtype=pl.String))
+        missing = changes["cells"].is_null().arg_true()
+        with phase("format", len(missing)):
+            cells = [
+                _CELL_SEPARATOR.join(_table_row(row, ""))
+                for row in _table_rows(changes[missing])
+            ]
+        changes = changes.with_columns(
+            changes["cells"].scatter(missing, cells) if cells else pl.col("cells")
+        )
+        kept = [c for c in CLASSIFIED_COLUMNS if c in classified.columns]
+        saved = classified.select("name", "fingerprint", *kept).join(
+            changes.select("name", "cells"),
+            on="name",
+            how="left",
+            maintain_order="left",
+        )
+        if "cells" in classified.columns:
+            # Rows not shown this time keep what they were displayed as before
+            saved = saved.with_columns(pl.col("cells").fill_null(classified["cells"]))
+        state.save(saved)
+    return changes, mname_1, mname_2, worsened, improved
+
+
+def _params_frame(*prepared: PreparedResult) -> pl.DataFrame:
+    """Base name and parameter columns per benchmark, from any of ``prepared``."""
+    frames = [
+        pr.frame.select("name", "benchmark_base", "_param_names", "^param_.*$")
+        for pr in prepared
+    ]
+    return pl.concat(frames, how="diagonal_relaxed").unique("name", keep="first")
+
+
+def _finite(value: float | None) -> float | None:
+    """``value``, or None where JSON has no equivalent (NaN, infinities)."""
+    if value is None or math.isnan(value) or math.isinf(value):
+        return None
+    return value
+
+
+def _params(row: dict) -> dict[str, str] | None:
+    if not row.get("_param_names"):
+        return None
+    return {pname: row.get(f"param_{pname}") for pname in row["_param_names"]}
+
+
+# Ratios as sort keys: NaN (nothing to compare) sorts last, infinity first
+_RATIO_KEY = pl.col("ratio").fill_nan(None)
+
+
+def _sorted_changes(changes: pl.DataFrame, sort: str) -> pl.DataFrame:
+    """Classified changes in ``sort`` order; ties keep their order."""
+    if sort == "ratio":
+        return changes.sort(
+            _RATIO_KEY, descending=True, nulls_last=True, maintain_order=True
+        )
+    if sort == "name":
+        return changes.sort("name", maintain_order=True)
+    if sort != "default":
+        raise ValueError("Unknown 'sort'")
+    return changes
+
+
+def _top_changes(changes: pl.DataFrame, top: int) -> pl.DataFrame:
+    """The ``top`` largest regressions, then improvements, by ratio.
+
+    Only these rows are selected (with a partial sort), so only they are
+    formatted later on. Regressions come worst first and improvements best
+    first, ties by name. Benchmarks which started failing, or were fixed,
+    have no ratio to rank them by; all of them are kept, by name, ahead of
+    the regressions and improvements respectively.
+    """
+    after_is = pl.col("after_is")
+    failed = changes.filter(after_is == AfterIs.FAILED.value)
+    fixed = changes.filter(after_is == AfterIs.FIXED.value)
+    worse = changes.filter(after_is == AfterIs.WORSE.value).top_k(
+        top, by=[_RATIO_KEY, "name"], reverse=[False, True]
+    )
+    better = changes.filter(after_is == AfterIs.BETTER.value).bottom_k(
+        top, by=[_RATIO_KEY, "name"]
+    )
+    return pl.concat(
+        [
+            failed.sort("name"),
+            worse.sort(_RATIO_KEY, "name", descending=[True, False]),
+            fixed.sort("name"),
+            better.sort(_RATIO_KEY, "name"),
+        ]
+    )
+
+
+def compare_records(
     result_before: str,
     result_after: str,
     benchmarks_path: str | Path | None,
     factor: float = 1.1,
-    split: bool = False,
     only_changed: bool = False,
     sort: str = "default",
     use_stats: bool = True,
     label_before: str | None = None,
     label_after: str | None = None,
-    no_env_label: bool = False,
     only_improved: bool = False,
     only_regressed: bool = False,
-) -> tuple[str, bool, bool]:
-    """Compare two ASV result files.
+    cache: ResultCache | None = None,
+    significance: str = "asv",
+    seed: int = 0,
+    state: ComparisonState | None = None,
+    top: int | None = None,
+    bench: str | list[str] | None = None,
+) -> tuple[Iterator[dict], bool, bool]:
+    """Compare two ASV result files, as one record per benchmark.
+
+    Takes the same arguments as ``do_compare``, but returns an iterator of
+    JSON-serializable dicts rather than a table, generated as consumed.
+    Values that are missing, failed or not finite are None; ``change`` is
+    an ``AfterIs`` value. With ``top``, the records are those of the
+    ``top`` largest regressions, worst first, then of the ``top`` largest
+    improvements, best first.
 
     Returns:
-        (table_output, has_regressions, has_improvements)
+        (records, has_regressions, has_improvements)
     """
-    res_1 = results.Results.load(result_before)
-    res_2 = results.Results.load(result_after)
+    changes, mname_1, mname_2, worsened, improved = _compare_changes(
+        result_before,
+        result_after,
+        benchmarks_path,
+        factor,
+        use_stats,
+        cache,
+        significance,
+        seed,
+        only_changed,
+        only_improved,
+        only_regressed,
+        state,
+        top=top,
+        bench=bench,
+    )
+    changes = _sorted_changes(changes, sort)
+    env_1 = label_before if label_before is not None else mname_1
+    env_2 = label_after if label_after is not None else mname_2
 
-    if benchmarks_path is not None:
-        benchmarks_path = Path(benchmarks_path)
+    def records() -> Iterator[dict]:
+        for row in changes.iter_rows(named=True):
+            record = {
+                "name": row["name"],
+                "benchmark": row["benchmark_base"],
+                "params": _params(row),
+                "unit": row["units_1"] or row["units_2"],
+                "before_env": env_1,
+                "after_env": env_2,
+                "before": _finite(row["result_1"]),
+                "before_err": _finite(row["err_1"]),
+                "after": _finite(row["result_2"]),
+                "after_err": _finite(row["err_2"]),
+                "ratio": None if row["ratio_na"] else row["ratio"],
+                "change": row["after_is"],
+                "significant": row["significant"],
+            }
+            for column in ("p_value", "ratio_ci_low", "ratio_ci_high"):
+                if column in row:
+                    record[column] = _finite(row[column])
+            yield record
 
-    benchmarks = ReadOnlyASVBenchmarks(benchmarks_path).benchmarks
+    return records(), worsened, improved
 
-    preparer = ResultPreparer(benchmarks)
-    prepared_1 = preparer.prepare(res_1)
-    prepared_2 = preparer.prepare(res_2)
 
-    mname_1 = f"{prepared_1.machine_name}/{prepared_1.env_name}"
-    mname_2 = f"{prepared_2.machine_name}/{prepared_2.env_name}"
-    machine_env_names = {mname_1, mname_2}
+def write_records(records: Iterable[dict], fmt: str, out: TextIO) -> None:
+    """Write records as they come, as a JSON array or as NDJSON lines."""
+    if fmt not in ("json", "ndjson"):
+        raise ValueError(f"Unknown record format: {fmt!r}")
+    with phase("render", 0) as handle:
+        if fmt == "ndjson":
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+                handle.items += 1
+            return
+        out.write("[")
+        separator = "\n"
+        for record in records:
+            out.write(separator + json.dumps(record))
+            separator = ",\n"
+            handle.items += 1
+        out.write("\n]\n" if separator != "\n" else "]\n")
 
-    joint_benchmarks = sorted(
-        set(prepared_1.results.keys()) | set(prepared_2.results.keys())
-    )
 
-    if split:
-        bench = {"green": [], "red": [], "lightgrey": [], "default": []}
-    else:
-        bench = {"all": []}
+_TITLES = {
+    "green": "Benchmarks that have improved:",
+    "default": "Benchmarks that have stayed the same:",
+    "red": "Benchmarks that have got worse:",
+    "lightgrey": "Benchmarks that are not comparable:",
+    "all": "All benchmarks:",
+}
 
-    worsened = False
-    improved = False
 
-    for benchmark in joint_benchmarks:
-        asv1 = ASVBench.from_prepared_result(benchmark, prepared_1)
-        asv2 = ASVBench.from_prepared_result(benchmark, prepared_2)
+def _env_suffix(
+    mname_1: str,
+    mname_2: str,
+    label_before: str | None,
+    label_after: str | None,
+    no_env_label: bool,
+) -> str:
+    """The `` [before -> after]`` suffix of benchmark names in the table."""
+    if no_env_label or mname_1 == mname_2:
+        return ""
+    lbl_1 = label_before if label_before is not None else mname_1
+    lbl_2 = label_after if label_after is not None else mname_2
+    return f" [{lbl_1} -> {lbl_2}]"
 
-        ratio = Ratio(t1=asv1.time, t2=asv2.time)
 
-        info = get_change_info(asv1, asv2, factor, use_stats)
-        color = info.color.value
-        mark = info.mark.value
+def _table_headers(columns: list[str]) -> list[str]:
+    headers = ["Change", "Before", "After", "Ratio", "Benchmark (Parameter)"]
+    if "p_value" in columns:
+        headers.insert(4, "p-value")
+    elif "ratio_ci_low" in columns:
+        headers.insert(4, "Ratio CI")
+    return headers
 
-        if info.is_worsened:
-            worsened = True
-        if info.is_improved:
-            improved = True
 
-        # Mark statistically insignificant results
-        if info.after_is.value == "same" and not ratio.is_na:
-            if _is_result_better(
-                asv1.time, asv2.time, None, None, factor
-            ) or _is_result_better(asv2.time, asv1.time, None, None, factor):
-                ratio = Ratio(t1=asv1.time, t2=asv2.time, is_insignificant=True)
+# Joins the cells of a table row stored in a ``ComparisonState``
+_CELL_SEPARATOR = "\x1f"
+_TABLE_COLUMNS = [
+    "name",
+    "after_is",
+    "ratio",
+    "ratio_na",
+    "insignificant",
+    "units_1",
+    "units_2",
+    "result_1",
+    "result_2",
+    "err_1",
+    "err_2",
+    "p_value",
+    "ratio_ci_low",
+    "ratio_ci_high",
+    "cells",
+]
 
-        if ratio.is_na:
-            ratio_str = "n/a"
-            ratio_num = 1e9
-        else:
-            ratio_num = ratio.val
-            ratio_str = repr(ratio) if ratio.is_insignificant else f"{ratio.val:6.2f}"
 
-        if only_changed and mark in (" ", "x"):
-            continue
-        if only_improved and color != "green":
-            continue
-        if only_regressed and color != "red":
-            continue
+def _table_rows(changes: pl.DataFrame) -> Iterator[dict]:
+    """Rows of ``changes`` with only what ``_table_row`` needs."""
+    columns = [c for c in _TABLE_COLUMNS if c in changes.columns]
+    return changes.select(columns).iter_rows(named=True)
 
-        unit = asv1.unit or asv2.unit
 
-        details = (
-            f"{mark:1s} {human_value_fallback(asv1.time, unit, err=asv1.err):>15s}"
-            f"  {human_value_fallback(asv2.time, unit, err=asv2.err):>15s}"
-            f" {ratio_str:>8s}  "
-        )
-        split_line = details.split()
-        if no_env_label or len(machine_env_names) <= 1:
-            benchmark_name = benchmark
-        elif label_before is not None or label_after is not None:
-            lbl_1 = label_before if label_before is not None else mname_1
-            lbl_2 = label_after if label_after is not None else mname_2
-            benchmark_name = f"{benchmark} [{lbl_1} -> {lbl_2}]"
-        else:
-            benchmark_name = f"{benchmark} [{mname_1} -> {mname_2}]"
-        if len(split_line) == 4:
-            split_line += [benchmark_name]
-        else:
-            split_line = [" "] + split_line + [benchmark_name]
-        if split:
-            bench[color].append(split_line)
-        else:
-            bench["all"].append(split_line)
+def _table_row(row: dict, suffix: str) -> list[str]:
+    """Cells of the comparison table for one row of classified changes."""
+    if row.get("cells"):
+        *cells, benchmark_name = row["cells"].split(_CELL_SEPARATOR)
+        return [*cells, benchmark_name + suffix]
+    info = AFTER_IS_INFO[AfterIs(row["after_is"])]
+    mark = info.mark.value
+    ratio_str = _format_ratio(row["ratio"], row["ratio_na"], row["insignificant"])
+
+    unit = row["units_1"] or row["units_2"]
+    before = human_value_fallback(row["result_1"], unit, err=row["err_1"])
+    after = human_value_fallback(row["result_2"], unit, err=row["err_2"])
+
+    details = f"{mark:1s} {before:>15s}  {after:>15s} {ratio_str:>8s}  "
+    split_line = details.split()
+    if len(split_line) == 4:
+        split_line += [row["name"] + suffix]
+    else:
+        split_line = [" "] + split_line + [row["name"] + suffix]
+    if "p_value" in row:
+        p_value = row["p_value"]
+        split_line.insert(4, "" if p_value is None else f"{p_value:.2g}")
+    elif "ratio_ci_low" in row:
+        low, high = row["ratio_ci_low"], row["ratio_ci_high"]
+        split_line.insert(4, "" if low is None else f"[{low:.2f}, {high:.2f}]")
+    return split_line
+
+
+def _compare_table(
+    changes: pl.DataFrame, suffix: str, split: bool, sort: str, titles: bool = True
+) -> str:
+    """Tabulate classified changes, in one section per color if ``split``.
+
+    With ``titles``, each section's title is printed as it is laid out.
+    """
+    changes = _sorted_changes(changes, sort)
+    if split:
+        bench = {"green": [], "red": [], "lightgrey": [], "default": []}
+    else:
+        bench = {"all": []}
+
+    with phase("format", changes.height):
+        for row in _table_rows(changes):
+            split_line = _table_row(row, suffix)
+            if split:
+                color = AFTER_IS_INFO[AfterIs(row["after_is"])].color.value
+                bench[color].append(split_line)
+            else:
+                bench["all"].append(split_line)
 
     if split:
         keys = ["green", "default", "red", "lightgrey"]
     else:
         keys = ["all"]
 
-    titles = {
-        "green": "Benchmarks that have improved:",
-        "default": "Benchmarks that have stayed the same:",
-        "red": "Benchmarks that have got worse:",
-        "lightgrey": "Benchmarks that are not comparable:",
-        "all": "All benchmarks:",
-    }
+    if "asv.console" in sys.modules:  # Imported lazily; flush anything asv logged
+        sys.modules["asv.console"].log.flush()
 
-    log.flush()
+    import tabulate
+    from asv_runner.console import color_print  # type: ignore[import-untyped]
+
+    headers = _table_headers(changes.columns)
 
     sections = []
     for key in keys:
         if not bench[key]:
             continue
 
-        if sort == "default":
-            pass
-        elif sort == "ratio":
-            bench[key].sort(key=lambda v: v[3], reverse=True)
-        elif sort == "name":
-            bench[key].sort(key=lambda v: v[2])
-        else:
-            raise ValueError("Unknown 'sort'")
-
-        table = tabulate.tabulate(
-            bench[key],
-            headers=[
-                "Change",
-                "Before",
-                "After",
-                "Ratio",
-                "Benchmark (Parameter)",
-            ],
-            tablefmt="github",
-        )
+        with phase("render", len(bench[key])):
+            table = tabulate.tabulate(
+                bench[key],
+                headers=headers,
+                tablefmt="github",
+            )
 
-        if not only_changed:
+        if titles:
             color_print("")
-            color_print(titles[key])
+            color_print(_TITLES[key])
             color_print("")
 
         sections.append(table)
 
-    return "\n\n".join(sections), worsened, improved
+    return "\n\n".join(sections)
 
 
-def do_compare_many(
-    baseline_result: str,
-    contender_results: list[str],
+def do_compare(
+    result_before: str,
+    result_after: str,
     benchmarks_path: str | Path | None,
     factor: float = 1.1,
+    split: bool = False,
+    only_changed: bool = False,
     sort: str = "default",
     use_stats: bool = True,
-    labels: list[str] | None = None,
-) -> str:
-    """Compare multiple ASV result files against a baseline."""
-    res_base = results.Results.load(baseline_result)
-    res_contenders = [results.Results.load(r) for r in contender_results]
+    label_before: str | None = None,
+    label_after: str | None = None,
+    no_env_label: bool = False,
+    only_improved: bool = False,
+    only_regressed: bool = False,
+    cache: ResultCache | None = None,
+    significance: str = "asv",
+    seed: int = 0,
+    state: ComparisonState | None = None,
+    top: int | None = None,
+    bench: str | list[str] | None = None,
+) -> tuple[str, bool, bool]:
+    """Compare two ASV result files.
+
+    ``significance`` picks the statistical test deciding whether a change
+    is real (see ``SIGNIFICANCE_METHODS``); the sample-based tests add a
+    column with their p-value or the confidence interval of the ratio.
+
+    With a ``state``, only benchmarks whose values, statistics or versions
+    changed since the comparison stored in it are classified and formatted
+    again, and the state is updated for the next run.
+
+    With ``top``, only the ``top`` largest regressions and improvements by
+    ratio are selected and formatted, in split sections (regardless of
+    ``split``), worst and best first unless sorted otherwise.
+
+    ``bench`` is a regex, or a list of them, selecting benchmarks by their
+    expanded names; others are skipped while loading the result files.
+
+    Returns:
+        (table_output, has_regressions, has_improvements)
+    """
+    changes, mname_1, mname_2, worsened, improved = _compare_changes(
+        result_before,
+        result_after,
+        benchmarks_path,
+        factor,
+        use_stats,
+        cache,
+        significance,
+        seed,
+        only_changed,
+        only_improved,
+        only_regressed,
+        state,
+        top=top,
+        bench=bench,
+    )
+    suffix = _env_suffix(mname_1, mname_2, label_before, label_after, no_env_label)
+    split = split or top is not None
+    table = _compare_table(changes, suffix, split, sort, titles=not only_changed)
+    return table, worsened, improved
 
-    if benchmarks_path is not None:
-        benchmarks_path = Path(benchmarks_path)
 
-    benchmarks_meta = ReadOnlyASVBenchmarks(benchmarks_path).benchmarks
-    preparer = ResultPreparer(benchmarks_meta)
+# Widths of the columns of a streamed table; longer cells overflow. The
+# last column (the benchmark name) is never padded.
+_STREAM_WIDTHS = {
+    "Change": 6,
+    "Before": 15,
+    "After": 15,
+    "Ratio": 8,
+    "p-value": 7,
+    "Ratio CI": 14,
+}
+# Numeric columns are right-aligned, as tabulate does
+_STREAM_RIGHT = {"Ratio", "p-value"}
 
-    prepared_base = preparer.prepare(res_base)
-    prepared_contenders = [preparer.prepare(r) for r in res_contenders]
+
+def _stream_line(cells: list[str], widths: list[int], right: list[bool]) -> str:
+    padded = [
+        cell.rjust(width) if is_right else cell.ljust(width)
+        for cell, width, is_right in zip(cells, widths, right)
+    ]
+    return "| " + " | ".join([*padded, cells[-1]]) + " |\n"
+
+
+def stream_compare(
+    result_before: str,
+    result_after: str,
+    benchmarks_path: str | Path | None,
+    out: TextIO,
+    factor: float = 1.1,
+    only_changed: bool = False,
+    use_stats: bool = True,
+    label_before: str | None = None,
+    label_after: str | None = None,
+    no_env_label: bool = False,
+    only_improved: bool = False,
+    only_regressed: bool = False,
+    cache: ResultCache | None = None,
+    significance: str = "asv",
+    seed: int = 0,
+    state: ComparisonState | None = None,
+    bench: str | list[str] | None = None,
+) -> tuple[bool, bool]:
+    """Compare two ASV result files, writing the table to ``out`` row by row.
+
+    Takes the same arguments as an unsplit, unsorted ``do_compare``. Rather
+    than sizing columns to their contents, the table is laid out with fixed
+    widths, so each row is written as soon as it is formatted and nothing
+    but the current row is held as text.
+
+    Returns:
+        (has_regressions, has_improvements)
+    """
+    changes, mname_1, mname_2, worsened, improved = _compare_changes(
+        result_before,
+        result_after,
+        benchmarks_path,
+        factor,
+        use_stats,
+        cache,
+        significance,
+        seed,
+        only_changed,
+        only_improved,
+        only_regressed,
+        state,
+        bench=bench,
+    )
+    if "asv.console" in sys.modules:  # Imported lazily; flush anything asv logged
+        sys.modules["asv.console"].log.flush()
+    if changes.is_empty():
+        return worsened, improved
+
+    suffix = _env_suffix(mname_1, mname_2, label_before, label_after, no_env_label)
+    headers = _table_headers(changes.columns)
+    widths = [_STREAM_WIDTHS[h] for h in headers[:-1]]
+    right = [h in _STREAM_RIGHT for h in headers[:-1]]
+
+    if not only_changed:
+        out.write(f"\n{_TITLES['all']}\n\n")
+    out.write(_stream_line(headers, widths, right))
+    out.write(
+        "|" + "|".join("-" * (w + 2) for w in [*widths, len(headers[-1])]) + "|\n"
+    )
+    with phase("render", changes.height):
+        for row in _table_rows(changes):
+            out.write(_stream_line(_table_row(row, suffix), widths, right))
+    return worsened, improved
+
+
+def _load_many(
+    baseline_result: str,
+    contender_results: list[str],
+    benchmarks_path: str | Path | None,
+    labels: list[str] | None,
+    jobs: int,
+    cache: ResultCache | None,
+    bench: str | list[str] | None,
+) -> tuple[PreparedResult, list[PreparedResult], list[str]]:
+    """Prepared baseline and contenders, with their display names."""
+    preparer = _preparer(benchmarks_path, cache, bench)
+    prepared_base, *prepared_contenders = load_prepared_many(
+        [baseline_result, *contender_results], preparer, jobs=jobs, cache=cache
+    )
 
     mname_base = f"{prepared_base.machine_name}/{prepared_base.env_name}"
     mnames_contenders = [f"{p.machine_name}/{p.env_name}" for p in prepared_contenders]
@@ -269,62 +892,295 @@ def do_compare_many(
         display_names = labels
     else:
         display_names = [mname_base] + mnames_contenders
+    return prepared_base, prepared_contenders, display_names
 
-    all_bench_keys = set(prepared_base.results.keys())
-    for p in prepared_contenders:
-        all_bench_keys |= set(p.results.keys())
-    joint_benchmarks = sorted(all_bench_keys)
 
-    table_data = []
-    unit_base = None
+def _compare_many_frame(
+    prepared_base: PreparedResult,
+    prepared_contenders: list[PreparedResult],
+    factor: float,
+    use_stats: bool,
+) -> pl.DataFrame:
+    """Benchmarks by contenders matrix, one row per benchmark sorted by name.
 
-    for benchmark in joint_benchmarks:
-        asv_base = ASVBench.from_prepared_result(benchmark, prepared_base)
-        row = [benchmark]
-
-        # Baseline value
-        unit = asv_base.unit
-        row.append(human_value_fallback(asv_base.time, unit, err=asv_base.err))
+    The baseline is described by ``result_0``, ``err_0`` and ``units_0``.
+    Each contender ``i`` (from 1) adds the same columns, together with the
+    ``ratio_i``, ``ratio_na_i``, ``significant_i``, ``insignificant_i`` and
+    ``after_is_i`` of ``classify_changes`` against the baseline. Benchmarks
+    missing from a side have a NaN result there.
+    """
+    every = [prepared_base, *prepared_contenders]
+    matrix = pl.concat([pr.frame.select("name") for pr in every]).unique()
+    base = prepared_base.frame.select(
+        "name",
+        result_0=pl.col("result"),
+        err_0=prepared_base.err,
+        units_0=pl.col("units"),
+        _present=pl.lit(True),
+    )
+    matrix = matrix.join(base, on="name", how="left").select(
+        "name",
+        pl.when(pl.col("_present")).then(pl.col("result_0")).otherwise(math.nan),
+        "err_0",
+        "units_0",
+    )
+    for i, prepared in enumerate(prepared_contenders, 1):
+        classified = classify_changes(
+            join_prepared(prepared_base, prepared), factor, use_stats
+        ).select(
+            "name",
+            pl.col("result_2").alias(f"result_{i}"),
+            pl.col("err_2").alias(f"err_{i}"),
+            pl.col("units_2").alias(f"units_{i}"),
+            pl.col("ratio").alias(f"ratio_{i}"),
+            pl.col("ratio_na").alias(f"ratio_na_{i}"),
+            pl.col("significant").alias(f"significant_{i}"),
+            pl.col("insignificant").alias(f"insignificant_{i}"),
+            pl.col("after_is").alias(f"after_is_{i}"),
+            _present=pl.lit(True),
+        )
+        # Rows only other contenders have are missing from both sides here
+        present = pl.col("_present").fill_null(False)
+        matrix = (
+            matrix.join(classified, on="name", how="left")
+            .with_columns(
+                pl.when(present).then(pl.col(f"result_{i}")).otherwise(math.nan),
+                pl.col(f"ratio_{i}").fill_null(math.nan),
+                pl.col(f"ratio_na_{i}").fill_null(True),
+                pl.col(f"significant_{i}").fill_null(True),
+                pl.col(f"insignificant_{i}").fill_null(False),
+                pl.col(f"after_is_{i}").fill_null(AfterIs.SAME.value),
+            )
+            .drop("_present")
+        )
+    return matrix.sort("name")
 
-        for p_cont in prepared_contenders:
-            asv_cont = ASVBench.from_prepared_result(benchmark, p_cont)
-            ratio = Ratio(t1=asv_base.time, t2=asv_cont.time)
 
-            info = get_change_info(asv_base, asv_cont, factor, use_stats)
-            mark = info.mark.value
+def _check_many_sort(sort: str) -> None:
+    # Rows are sorted by benchmark name, whatever the sort
+    if sort not in ("default", "name"):
+        raise ValueError("Unknown 'sort'")
 
-            if ratio.is_na:
-                ratio_str = "n/a"
-            else:
-                # Mark statistically insignificant results
-                if info.after_is.value == "same":
-                    if _is_result_better(
-                        asv_base.time, asv_cont.time, None, None, factor
-                    ) or _is_result_better(
-                        asv_cont.time, asv_base.time, None, None, factor
-                    ):
-                        ratio = Ratio(
-                            t1=asv_base.time,
-                            t2=asv_cont.time,
-                            is_insignificant=True,
-                        )
-                ratio_str = (
-                    repr(ratio) if ratio.is_insignificant else f"{ratio.val:6.2f}"
-                )
 
-            val_str = human_value_fallback(
-                asv_cont.time, asv_cont.unit or unit, err=asv_cont.err
+def _compare_many_cells(matrix: pl.DataFrame, n_contenders: int) -> Iterator[list]:
+    """Table cells of each row of a ``_compare_many_frame`` matrix."""
+    marks = {a.value: info.mark.value for a, info in AFTER_IS_INFO.items()}
+    for row in matrix.iter_rows(named=True):
+        unit = row["units_0"]
+        cells = [row["name"], human_value_fallback(row["result_0"], unit, row["err_0"])]
+        for i in range(1, n_contenders + 1):
+            value = human_value_fallback(
+                row[f"result_{i}"], row[f"units_{i}"] or unit, err=row[f"err_{i}"]
             )
-            row.append(f"{val_str} ({mark}{ratio_str})")
+            ratio = _format_ratio(
+                row[f"ratio_{i}"], row[f"ratio_na_{i}"], row[f"insignificant_{i}"]
+            )
+            cells.append(f"{value} ({marks[row[f'after_is_{i}']]}{ratio})")
+        yield cells
 
-        table_data.append(row)
 
-    if sort == "name":
-        table_data.sort(key=lambda v: v[0])
-    # Default sort is by benchmark name here as well for now
+def do_compare_many(
+    baseline_result: str,
+    contender_results: list[str],
+    benchmarks_path: str | Path | None,
+    factor: float = 1.1,
+    sort: str = "default",
+    use_stats: bool = True,
+    labels: list[str] | None = None,
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+    bench: str | list[str] | None = None,
+) -> str:
+    """Compare multiple ASV result files against a baseline.
+
+    With ``jobs`` other than 1, result files are loaded and prepared in a pool
+    of that many processes (0 for one per CPU). ``bench`` selects benchmarks
+    as for ``do_compare``.
+    """
+    import tabulate
+
+    _check_many_sort(sort)
+    prepared_base, prepared_contenders, display_names = _load_many(
+        baseline_result, contender_results, benchmarks_path, labels, jobs, cache, bench
+    )
+    n_contenders = len(prepared_contenders)
+    with phase("classify") as handle:
+        matrix = _compare_many_frame(
+            prepared_base, prepared_contenders, factor, use_stats
+        )
+        handle.items = matrix.height * n_contenders
+    with phase("format", matrix.height):
+        table_data = list(_compare_many_cells(matrix, n_contenders))
 
     headers = ["Benchmark", f"Baseline ({display_names[0]})"]
     for name in display_names[1:]:
         headers.append(f"{name} (Ratio)")
 
-    return tabulate.tabulate(table_data, headers=headers, tablefmt="github")
+    with phase("render", len(table_data)):
+        # Contender cells are never numbers, so save tabulate trying to parse them
+        return tabulate.tabulate(
+            table_data,
+            headers=headers,
+            tablefmt="github",
+            disable_numparse=list(range(2, 2 + n_contenders)) if table_data else False,
+        )
+
+
+def compare_many_records(
+    baseline_result: str,
+    contender_results: list[str],
+    benchmarks_path: str | Path | None,
+    factor: float = 1.1,
+    sort: str = "default",
+    use_stats: bool = True,
+    labels: list[str] | None = None,
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+    bench: str | list[str] | None = None,
+) -> Iterator[dict]:
+    """Compare multiple ASV result files against a baseline, as records.
+
+    Takes the same arguments as ``do_compare_many``. Yields one
+    JSON-serializable dict per benchmark, in name order, as consumed; see
+    ``compare_records`` for the conventions.
+    """
+    _check_many_sort(sort)
+    prepared_base, prepared_contenders, display_names = _load_many(
+        baseline_result, contender_results, benchmarks_path, labels, jobs, cache, bench
+    )
+    n_contenders = len(prepared_contenders)
+    with phase("classify") as handle:
+        matrix = _compare_many_frame(
+            prepared_base, prepared_contenders, factor, use_stats
+        )
+        handle.items = matrix.height * n_contenders
+    params = _params_frame(prepared_base, *prepared_contenders)
+    matrix = matrix.join(params, on="name", how="left", maintain_order="left")
+
+    for row in matrix.iter_rows(named=True):
+        units = (row[f"units_{i}"] for i in range(n_contenders + 1))
+        yield {
+            "name": row["name"],
+            "benchmark": row["benchmark_base"],
+            "params": _params(row),
+            "unit": next((unit for unit in units if unit), None),
+            "baseline": {
+                "env": display_names[0],
+                "value": _finite(row["result_0"]),
+                "err": _finite(row["err_0"]),
+            },
+            "contenders": [
+                {
+                    "env": env,
+                    "value": _finite(row[f"result_{i}"]),
+                    "err": _finite(row[f"err_{i}"]),
+                    "ratio": None if row[f"ratio_na_{i}"] else row[f"ratio_{i}"],
+                    "change": row[f"after_is_{i}"],
+                    "significant": row[f"significant_{i}"],
+                }
+                for i, env in enumerate(display_names[1:], 1)
+            ],
+        }
+
+
+# Newly failing benchmarks count as regressions, as for the exit code of
+# compare, and fixed ones as improvements.
+_IMPROVED = [AfterIs.BETTER.value, AfterIs.FIXED.value]
+_REGRESSED = [AfterIs.WORSE.value, AfterIs.FAILED.value]
+
+
+def _summarize_many(
+    matrix: pl.DataFrame, display_names: list[str], worst: int
+) -> list[dict]:
+    """Per-contender aggregates of a ``_compare_many_frame`` matrix.
+
+    Ties in ``worst`` keep the order of the matrix, sorted by name.
+    """
+    exprs = []
+    for i in range(1, len(display_names)):
+        ratio, after_is = pl.col(f"ratio_{i}"), pl.col(f"after_is_{i}")
+        comparable = ~pl.col(f"ratio_na_{i}")
+        exprs += [
+            comparable.sum().alias(f"compared_{i}"),
+            after_is.is_in(_IMPROVED).sum().alias(f"improved_{i}"),
+            after_is.is_in(_REGRESSED).sum().alias(f"regressed_{i}"),
+            ratio.filter(comparable & (ratio > 0))
+            .log()
+            .mean()
+            .exp()
+            .alias(f"geomean_{i}"),
+            pl.struct(name="name", ratio=ratio)
+            .filter(comparable)
+            .sort_by(ratio.filter(comparable), descending=True, maintain_order=True)
+            .head(worst)
+            .implode()
+            .alias(f"worst_{i}"),
+        ]
+    totals = matrix.select(exprs).row(0, named=True) if exprs else {}
+    return [
+        {
+            "env": env,
+            "compared": totals[f"compared_{i}"],
+            "improved": totals[f"improved_{i}"],
+            "regressed": totals[f"regressed_{i}"],
+            "geomean_ratio": _finite(totals[f"geomean_{i}"]),
+            "worst": totals[f"worst_{i}"],
+        }
+        for i, env in enumerate(display_names[1:], 1)
+    ]
+
+
+def compare_many_summary(
+    baseline_result: str,
+    contender_results: list[str],
+    benchmarks_path: str | Path | None,
+    factor: float = 1.1,
+    use_stats: bool = True,
+    labels: list[str] | None = None,
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+    worst: int = 3,
+    bench: str | list[str] | None = None,
+) -> list[dict]:
+    """Compare multiple ASV result files against a baseline, per contender.
+
+    Takes the same arguments as ``do_compare_many``. Returns one
+    JSON-serializable dict per contender: how many benchmarks had a ratio
+    to the baseline, improved and regressed, the geometric mean of the
+    (positive) ratios, and the ``worst`` benchmarks with the highest
+    ratios, as ``name``/``ratio`` dicts.
+    """
+    prepared_base, prepared_contenders, display_names = _load_many(
+        baseline_result, contender_results, benchmarks_path, labels, jobs, cache, bench
+    )
+    with phase("classify") as handle:
+        matrix = _compare_many_frame(
+            prepared_base, prepared_contenders, factor, use_stats
+        )
+        handle.items = matrix.height * len(prepared_contenders)
+    return _summarize_many(matrix, display_names, worst)
+
+
+def format_many_summary(summary: list[dict]) -> str:
+    """Tabulate the records of ``compare_many_summary``."""
+    import tabulate
+
+    rows = []
+    for record in summary:
+        geomean = record["geomean_ratio"]
+        rows.append(
+            [
+                record["env"],
+                record["compared"],
+                record["improved"],
+                record["regressed"],
+                "n/a" if geomean is None else f"{geomean:.2f}",
+                ", ".join(f"{w['name']} ({w['ratio']:.2f})" for w in record["worst"]),
+            ]
+        )
+    headers = ["Contender", "Compared", "Improved", "Regressed", "Geomean", "Worst"]
+    with phase("render", len(rows)):
+        # Keep the two decimals of the geometric means
+        return tabulate.tabulate(
+            rows, headers=headers, tablefmt="github", disable_numparse=[4]
+        )
@@ -0,0 +1,242 @@
+"""Incrementally maintained history of an ASV results directory."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+from asv_spyglass._aux import default_cache_dir, file_identity
+from asv_spyglass.compare import ResultPreparer
+from asv_spyglass.profiling import phase
+
+# Bump whenever the layout of the stored segments changes
+HISTORY_VERSION = 1
+# Rewrite the store as a single segment once it is split into more than this
+MAX_SEGMENTS = 16
+
+HISTORY_COLUMNS = ["name", "benchmark_base", "commit_hash", "date", "machine", "env"]
+
+
+def scan_result_files(results_dir: Path) -> list[Path]:
+    """Result files in ``results_dir/<machine>/``, without ``machine.json``."""
+    return sorted(
+        path
+        for path in Path(results_dir).glob("*/*.json")
+        if path.name != "machine.json"
+    )
+
+
+def read_history_rows(
+    path: Path, source: str, preparer: ResultPreparer
+) -> pl.DataFrame:
+    """One row per unrolled benchmark of a result file, tagged with its commit."""
+    with phase("load") as handle:
+        stream = preparer.stream(path, samples=False)
+        frame = preparer.prepare(stream).frame.drop("samples", "_param_names")
+        handle.items = frame.height
+    frame = frame.with_columns(
+        commit_hash=pl.lit(stream.commit_hash, dtype=pl.String),
+        date=pl.lit(stream.date, dtype=pl.Int64).cast(pl.Datetime("ms")),
+        source=pl.lit(source),
+    )
+    return frame.select(*HISTORY_COLUMNS, pl.exclude(*HISTORY_COLUMNS))
+
+
+_worker_preparer: ResultPreparer | None = None
+
+
+def _init_worker(preparer: ResultPreparer) -> None:
+    global _worker_preparer
+    _worker_preparer = preparer
+
+
+def _read_worker(task: tuple[Path, str]) -> pl.DataFrame:
+    return read_history_rows(*task, _worker_preparer)
+
+
+@dataclass
+class HistoryUpdate:
+    """What a call to ``ResultHistory.update`` did."""
+
+    added: int = 0
+    removed: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+class ResultHistory:
+    """Columnar history of every result file under an ASV results directory.
+
+    Rows are stored as Parquet segments together with a manifest of the
+    result files they were read from (path, modification time and size).
+    ``update`` only reads files which are new or changed since the last
+    call, and drops rows of changed or deleted ones. The store is rebuilt
+    from scratch if the benchmarks metadata changes.
+    """
+
+    def __init__(
+        self,
+        results_dir: Path,
+        preparer: ResultPreparer,
+        store: Path | None = None,
+    ):
+        self.results_dir = Path(results_dir).resolve()
+        self.preparer = preparer
+        if store is None:
+            digest = hashlib.sha256(str(self.results_dir).encode()).hexdigest()
+            store = default_cache_dir() / "history" / digest[:16]
+        self.store = Path(store)
+        self._manifest_path = self.store / "manifest.json"
+
+    def _identity(self) -> str:
+        return json.dumps([HISTORY_VERSION, self.preparer.identity])
+
+    def _read_manifest(self) -> dict:
+        try:
+            manifest = json.loads(self._manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        if manifest is None or manifest.get("identity") != self._identity():
+            manifest = {"identity": self._identity(), "files": {}, "next_segment": 0}
+        return manifest
+
+    def _write_atomic(self, path: Path, write) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.store, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+
+    def _segments(self, manifest: dict) -> list[str]:
+        return sorted({rec[2] for rec in manifest["files"].values() if rec[2]})
+
+    def _new_segment(self, manifest: dict, frame: pl.DataFrame) -> str:
+        segment = f"segment-{manifest['next_segment']}.parquet"
+        manifest["next_segment"] += 1
+        self._write_atomic(self.store / segment, frame.write_parquet)
+        return segment
+
+    def update(self, jobs: int = 1, rebuild: bool = False) -> HistoryUpdate:
+        """Bring the store up to date with the results directory.
+
+        ``jobs`` is the number of worker processes used to parse new files
+        (0 for one per CPU, 1 to parse in this process). Files which fail
+        to parse are skipped and reported, and retried once they change.
+        """
+        self.store.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest()
+        if rebuild:
+            manifest["files"] = {}
+        known = manifest["files"]
+        current = {}
+        for path in scan_result_files(self.results_dir):
+            _, mtime_ns, size = file_identity(path)
+            current[path.relative_to(self.results_dir).as_posix()] = [mtime_ns, size]
+
+        stale = {
+            source for source, rec in known.items() if current.get(source) != rec[:2]
+        }
+        for segment in {known[source][2] for source in stale} - {None}:
+            kept = [
+                source
+                for source, rec in known.items()
+                if rec[2] == segment and source not in stale
+            ]
+            if kept:
+                frame = pl.read_parquet(self.store / segment)
+                frame = frame.filter(pl.col("source").is_in(kept))
+                self._write_atomic(self.store / segment, frame.write_parquet)
+        update = HistoryUpdate(removed=len(stale - current.keys()))
+        for source in stale:
+            del known[source]
+
+        pending = [source for source in current if source not in known]
+        tasks = [(self.results_dir / source, source) for source in pending]
+        results: list[pl.DataFrame | Exception] = []
+        if jobs == 1 or len(tasks) < 2:
+            for task in tasks:
+                try:
+                    results.append(read_history_rows(*task, self.preparer))
+                except Exception as exc:
+                    results.append(exc)
+        else:
+            # Polars is multithreaded, so use fresh interpreters rather than fork
+            with ProcessPoolExecutor(
+                max_workers=min(jobs or os.cpu_count() or 1, len(tasks)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.preparer,),
+            ) as pool:
+                futures = [pool.submit(_read_worker, task) for task in tasks]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as exc:
+                        results.append(exc)
+        frames = {}
+        for source, result in zip(pending, results):
+            if isinstance(result, Exception):
+                update.errors.append(f"{source}: {result}")
+                known[source] = [*current[source], None]
+            else:
+                frames[source] = result
+        if frames:
+            segment = self._new_segment(
+                manifest, pl.concat(frames.values(), how="diagonal_relaxed")
+            )
+            for source in frames:
+                known[source] = [*current[source], segment]
+            update.added = len(frames)
+
+        segments = self._segments(manifest)
+        if len(segments) > MAX_SEGMENTS:
+            frame = self._scan(segments).collect()
+            merged = self._new_segment(manifest, frame)
+            for rec in known.values():
+                if rec[2]:
+                    rec[2] = merged
+        self._write_atomic(
+            self._manifest_path,
+            lambda tmp: Path(tmp).write_text(json.dumps(manifest)),
+        )
+        # Segments no longer referenced, including any left by interrupted runs
+        referenced = set(self._segments(manifest))
+        for path in self.store.glob("segment-*.parquet"):
+            if path.name not in referenced:
+                path.unlink(missing_ok=True)
+        return update
+
+    def _scan(self, segments: list[str]) -> pl.LazyFrame:
+        if not segments:
+            return pl.LazyFrame(
+                schema={
+                    **{key: pl.String for key in HISTORY_COLUMNS},
+                    "date": pl.Datetime("ms"),
+                }
+            )
+        return pl.concat(
+            [pl.scan_parquet(self.store / segment) for segment in segments],
+            how="diagonal_relaxed",
+        )
+
+    def scan(self) -> pl.LazyFrame:
+        """Lazily query the stored history, as of the last ``update``."""
+        return self._scan(self._segments(self._read_manifest()))
+
+    def to_df(self) -> pl.DataFrame:
+        """The stored history, ordered by benchmark and date."""
+        return (
+            self.scan()
+            .drop("source", strict=False)
+            .sort("name", "machine", "env", "date")
+            .collect()
+        )
@@ -0,0 +1,154 @@
+"""Timing and memory of the phases of a comparison.
+
+The commands mark their phases (reading benchmarks.json, loading result
+files, classifying, rendering, ...) with ``phase``. Callables registered
+with ``add_hook`` receive a ``PhaseRecord`` as each phase ends; without
+any hooks, phases are not measured at all. ``Profiler`` is a hook which
+sums the records of each phase, and backs the ``--profile`` option.
+
+Phases run in worker processes (``--jobs``) are not recorded.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+@dataclass
+class PhaseRecord:
+    """One run of a phase.
+
+    ``wall`` and ``cpu`` are in seconds, ``peak_rss`` is the peak resident
+    memory of the process so far in bytes (None where unavailable), and
+    ``items`` is what the phase worked on: benchmarks, rows, ...
+    """
+
+    name: str
+    wall: float
+    cpu: float
+    peak_rss: int | None
+    items: int | None
+
+
+Hook = Callable[[PhaseRecord], None]
+
+_hooks: list[Hook] = []
+
+
+def add_hook(hook: Hook) -> Hook:
+    """Call ``hook`` with the record of every phase from now on."""
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    _hooks.remove(hook)
+
+
+def peak_rss() -> int | None:
+    """Peak resident memory of this process, in bytes."""
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Phase:
+    """Handle of a running phase; set ``items`` once they are known."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: int | None = None):
+        self.items = items
+
+
+@contextmanager
+def phase(name: str, items: int | None = None) -> Iterator[Phase]:
+    """Measure the enclosed block as a run of phase ``name``."""
+    handle = Phase(items)
+    if not _hooks:
+        yield handle
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield handle
+    finally:
+        record = PhaseRecord(
+            name,
+            time.perf_counter() - wall,
+            time.process_time() - cpu,
+            peak_rss(),
+            handle.items,
+        )
+        for hook in list(_hooks):
+            hook(record)
+
+
+class Profiler:
+    """Hook summing the records of each phase, in order of first run.
+
+    Used as a context manager, it is registered on entry and also records
+    a ``total`` phase spanning its whole lifetime. Nested phases are part
+    of their enclosing phase's time.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, PhaseRecord] = {}
+        self.calls: dict[str, int] = {}
+        self._total = None
+
+    def __call__(self, record: PhaseRecord) -> None:
+        seen = self.phases.get(record.name)
+        self.calls[record.name] = self.calls.get(record.name, 0) + 1
+        if seen is None:
+            self.phases[record.name] = PhaseRecord(**asdict(record))
+            return
+        seen.wall += record.wall
+        seen.cpu += record.cpu
+        if record.peak_rss is not None:
+            seen.peak_rss = max(seen.peak_rss or 0, record.peak_rss)
+        if record.items is not None:
+            seen.items = (seen.items or 0) + record.items
+
+    def __enter__(self) -> Profiler:
+        add_hook(self)
+        self._total = phase("total")
+        self._total.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._total.__exit__(*exc_info)
+        remove_hook(self)
+
+    def to_records(self) -> list[dict]:
+        """One JSON-serializable dict per phase."""
+        return [
+            {**asdict(record), "calls": self.calls[name]}
+            for name, record in self.phases.items()
+        ]
+
+    def format_table(self) -> str:
+        import tabulate
+
+        rows = [
+            [
+                rec["name"],
+                rec["calls"],
+                f"{rec['wall']:.3f}",
+                f"{rec['cpu']:.3f}",
+                "" if rec["peak_rss"] is None else f"{rec['peak_rss'] / 2**20:.1f}",
+                "" if rec["items"] is None else rec["items"],
+            ]
+            for rec in self.to_records()
+        ]
+        headers = ["Phase", "Calls", "Wall (s)", "CPU (s)", "Peak RSS (MiB)", "Items"]
+        return tabulate.tabulate(rows, headers=headers, tablefmt="github")
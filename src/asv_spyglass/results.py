@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import math
-import re
 from collections import namedtuple
+from collections.abc import Mapping
+from pathlib import Path
 
 import polars as pl
-from asv import results  # type: ignore[import-untyped]
 
 ASVResult = namedtuple(
     "ASVResult",
@@ -23,9 +24,21 @@ ASVResult = namedtuple(
 )
 
 
-def result_iter(bdot):
+def result_iter(bdot, bench=None):
+    """Iterate over the benchmarks of a loaded result as ``ASVResult`` records.
+
+    ``bdot`` is an ``asv.results.Results``, or an iterable already yielding
+    records such as a ``ResultStream``. Benchmarks of an ``asv.results.Results``
+    which a ``bench`` filter (a ``BenchmarkFilter``) does not select are
+    skipped before reading their values.
+    """
+    if not hasattr(bdot, "get_all_result_keys"):
+        yield from bdot
+        return
     for key in bdot.get_all_result_keys():
         params = bdot.get_result_params(key)
+        if bench and not bench.select(key, params):
+            continue
         result_value = bdot.get_result_value(key, params)
         result_stats = bdot.get_result_stats(key, params)
         result_samples = bdot.get_result_samples(key, params)
@@ -42,78 +55,310 @@ def result_iter(bdot):
         )
 
 
+STATS_FIELDS = ("ci_99_a", "ci_99_b", "q_25", "q_75", "number", "repeat")
+
+PREPARED_SCHEMA = {
+    "benchmark_base": pl.String,
+    "name": pl.String,
+    "result": pl.Float64,
+    "units": pl.String,
+    "machine": pl.String,
+    "env": pl.String,
+    "version": pl.String,
+    "ci_99_a": pl.Float64,
+    "ci_99_b": pl.Float64,
+    "q_25": pl.Float64,
+    "q_75": pl.Float64,
+    "number": pl.Int64,
+    "repeat": pl.Int64,
+    "samples": pl.List(pl.Float64),
+    # Underscored, unlike the param_<name> columns, so no parameter shadows it
+    "_param_names": pl.List(pl.String),
+}
+
+
+def _err_expr() -> pl.Expr:
+    """``asv_runner.statistics.get_err`` of every row, as an expression.
+
+    Half the interquartile range where a row has any stats, null otherwise.
+    """
+    has_stats = pl.any_horizontal(pl.col(field).is_not_null() for field in STATS_FIELDS)
+    return pl.when(has_stats).then((pl.col("q_75") - pl.col("q_25")) / 2)
+
+
+# File suffixes of prepared results exported by ``to-df``, by format
+EXPORT_SUFFIXES = {
+    ".parquet": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc",
+}
+
+
+class SamplesColumn:
+    """Builds the ``samples`` list column in compact chunks.
+
+    Raw samples can dwarf everything else in a result file, so rather than
+    holding them all as Python floats until the frame is built, they are
+    converted to Arrow-backed chunks every ``chunk_values`` values.
+    """
+
+    def __init__(self, chunk_values: int = 2**16):
+        self.chunk_values = chunk_values
+        self._chunks: list[pl.Series] = []
+        self._pending: list = []
+        self._pending_values = 0
+
+    def append(self, samples: list | None) -> None:
+        self._pending.append(samples)
+        if samples:
+            self._pending_values += len(samples)
+            if self._pending_values >= self.chunk_values:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._chunks.append(
+                pl.Series(
+                    "samples",
+                    self._pending,
+                    dtype=PREPARED_SCHEMA["samples"],
+                    strict=False,
+                )
+            )
+        self._pending = []
+        self._pending_values = 0
+
+    def to_series(self) -> pl.Series:
+        self._flush()
+        if not self._chunks:
+            return pl.Series("samples", [], dtype=PREPARED_SCHEMA["samples"])
+        return pl.concat(self._chunks, rechunk=True)
+
+
+class _ColumnView(Mapping):
+    """Read-only, dict-like view of one column keyed by benchmark name."""
+
+    def __init__(self, index: dict[str, int], values: list):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, name):
+        return self._values[self._index[name]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+
 @dataclasses.dataclass
 class PreparedResult:
-    """Augmented with information from the benchmarks.json"""
+    """Augmented with information from the benchmarks.json
 
-    units: dict
-    results: dict
-    stats: dict
-    versions: dict
+    Backed by a single columnar frame, with one row per unrolled benchmark
+    and the exploded parameters as ``param_<name>`` columns. The dict-style
+    ``units``, ``results``, ``stats``, ``versions``, ``errs`` and
+    ``param_names`` accessors are views over these columns.
+    """
+
+    frame: pl.DataFrame
     machine_name: str
     env_name: str
-    param_names: dict
+
+    @classmethod
+    def from_columns(
+        cls, columns: dict[str, list | pl.Series], machine_name: str, env_name: str
+    ) -> PreparedResult:
+        """Build from column lists or series, as filled by ``ResultPreparer``."""
+        nrows = len(columns["name"])
+        columns = {
+            **columns,
+            "machine": [machine_name] * nrows,
+            "env": [env_name] * nrows,
+        }
+        schema = {
+            key: PREPARED_SCHEMA.get(key, pl.String)
+            for key in [*PREPARED_SCHEMA, *columns]
+        }
+        frame = pl.DataFrame(
+            {key: columns[key] for key in schema}, schema=schema, strict=False
+        )
+        return cls(frame=frame, machine_name=machine_name, env_name=env_name)
+
+    @classmethod
+    def read_parquet(cls, path) -> PreparedResult:
+        """Read a prepared result written by ``write_parquet``."""
+        frame = pl.read_parquet(path)
+        return cls(
+            frame=frame,
+            machine_name=frame["machine"][0],
+            env_name=frame["env"][0],
+        )
+
+    def write_parquet(self, path) -> None:
+        self.frame.write_parquet(path)
+
+    @classmethod
+    def from_frame(cls, frame: pl.DataFrame) -> PreparedResult:
+        """Wrap a frame as returned by ``to_df``, restoring dropped columns.
+
+        Columns missing from ``frame`` are filled with nulls, except for
+        ``_param_names`` which is derived from the non-null ``param_<name>``
+        columns of each row.
+        """
+        if frame.is_empty():
+            raise ValueError("No benchmark results found in the exported file")
+        pnames = [
+            column.removeprefix("param_")
+            for column in frame.columns
+            if column.startswith("param_")
+        ]
+        if "_param_names" not in frame.columns and pnames:
+            derived = pl.concat_list(
+                pl.when(pl.col(f"param_{pname}").is_not_null()).then(pl.lit(pname))
+                for pname in pnames
+            ).list.drop_nulls()
+            frame = frame.with_columns(
+                _param_names=pl.when(derived.list.len() > 0).then(derived)
+            )
+        frame = frame.with_columns(
+            pl.lit(None, dtype=dtype).alias(key)
+            for key, dtype in PREPARED_SCHEMA.items()
+            if key not in frame.columns
+        )
+        frame = frame.select(*PREPARED_SCHEMA, pl.exclude(*PREPARED_SCHEMA)).cast(
+            PREPARED_SCHEMA
+        )
+        return cls(
+            frame=frame,
+            machine_name=frame["machine"][0],
+            env_name=frame["env"][0],
+        )
+
+    @classmethod
+    def read_export(cls, path) -> PreparedResult:
+        """Read a prepared result exported as Parquet or Arrow IPC."""
+        suffix = Path(path).suffix.lower()
+        if EXPORT_SUFFIXES.get(suffix) == "parquet":
+            frame = pl.read_parquet(path, hive_partitioning=False)
+        elif EXPORT_SUFFIXES.get(suffix) == "ipc":
+            frame = pl.read_ipc(path)
+        else:
+            raise ValueError(f"Unsupported export format: {path}")
+        return cls.from_frame(frame)
+
+    def write_export(self, path) -> None:
+        """Export ``to_df()`` as Parquet or Arrow IPC, chosen by file suffix."""
+        suffix = Path(path).suffix.lower()
+        if EXPORT_SUFFIXES.get(suffix) == "parquet":
+            self.to_df().write_parquet(path)
+        elif EXPORT_SUFFIXES.get(suffix) == "ipc":
+            self.to_df().write_ipc(path)
+        else:
+            raise ValueError(f"Unsupported export format: {path}")
 
     def __iter__(self):
-        for field in dataclasses.fields(self):
-            yield getattr(self, field.name)
+        yield from (
+            self.units,
+            self.results,
+            self.stats,
+            self.versions,
+            self.machine_name,
+            self.env_name,
+            self.param_names,
+        )
+
+    @functools.cached_property
+    def _row_index(self) -> dict[str, int]:
+        return {name: idx for idx, name in enumerate(self.frame["name"])}
+
+    def _view(self, column: str) -> _ColumnView:
+        return _ColumnView(self._row_index, self.frame[column].to_list())
+
+    @functools.cached_property
+    def units(self) -> Mapping[str, str | None]:
+        return self._view("units")
+
+    @functools.cached_property
+    def results(self) -> Mapping[str, float | None]:
+        return self._view("result")
+
+    @functools.cached_property
+    def versions(self) -> Mapping[str, str | None]:
+        return self._view("version")
+
+    @functools.cached_property
+    def param_names(self) -> Mapping[str, list[str] | None]:
+        return self._view("_param_names")
+
+    @functools.cached_property
+    def err(self) -> pl.Series:
+        """``ASVBench.err`` of every row, computed once for all benchmarks."""
+        return self.frame.select(_err_expr().alias("err")).to_series()
+
+    @functools.cached_property
+    def errs(self) -> Mapping[str, float | None]:
+        return _ColumnView(self._row_index, self.err.to_list())
+
+    @functools.cached_property
+    def stats(self) -> Mapping[str, tuple[dict | None, list | None]]:
+        """(stats, samples) pairs, in the shape asv's comparison helpers use."""
+        columns = [self.frame[field].to_list() for field in STATS_FIELDS]
+        entries = []
+        for row, samples in zip(zip(*columns), self.frame["samples"].to_list()):
+            stats = {k: v for k, v in zip(STATS_FIELDS, row) if v is not None}
+            entries.append((stats or None, samples))
+        return _ColumnView(self._row_index, entries)
 
     def to_df(self):
         """
-        Converts a PreparedResult object to a DataFrame, exploding the
-        parameters in the keys and flattening the results.
+        Returns the prepared result as a DataFrame, one row per benchmark with
+        the parameters exploded into ``param_<name>`` columns.
         """
+        return self.frame.drop("_param_names")
 
-        data = []
-        for key, result in self.results.items():
-            # Extract benchmark name and parameters
-            match = re.match(r"(.+)\((.*)\)", key)
-            if match:
-                benchmark_name = match.group(1)
-                params = match.group(2).split(", ")
-            else:
-                benchmark_name = key
-                params = []
-
-            # Flatten the results tuple
-            stats_dict, samples = self.stats[key]
-            if stats_dict is None:
-                stats_dict_maybe_null = {
-                    "ci_99_a": None,
-                    "ci_99_b": None,
-                    "q_25": None,
-                    "q_75": None,
-                    "number": None,
-                    "repeat": None,
-                }
-            else:
-                stats_dict_maybe_null = stats_dict
-
-            row = {
-                "benchmark_base": benchmark_name,
-                "name": key,
-                "result": result,
-                "units": self.units[key],
-                "machine": self.machine_name,
-                "env": self.env_name,
-                "version": self.versions[key],
-                **stats_dict_maybe_null,  # Expand the stats dictionary
-                "samples": samples,
-            }
-            # Combine param and parameter name for column names
-            pnames = self.param_names.get(key)
-            if pnames:
-                row.update(
-                    dict(
-                        zip(
-                            [f"param_{name}" for name in pnames],
-                            params,
-                        )
-                    )
-                )
-            data.append(row)
 
-        return pl.DataFrame(data)
+def join_prepared(before: PreparedResult, after: PreparedResult) -> pl.DataFrame:
+    """Full join of two prepared results on benchmark name, sorted by name.
+
+    Columns of ``before`` get a ``_1`` suffix and those of ``after`` a ``_2``
+    suffix. Benchmarks missing from one side get a NaN result there (as
+    opposed to null, which marks a failed benchmark), and ``err_1``/``err_2``
+    hold the same error measure as ``ASVBench.err``.
+    """
+    columns = ["result", "units", "version", *STATS_FIELDS, "samples"]
+
+    def side(pr: PreparedResult, suffix: str) -> pl.DataFrame:
+        return pr.frame.select(
+            "name",
+            *(pl.col(c).alias(f"{c}{suffix}") for c in columns),
+            pr.err.alias(f"err{suffix}"),
+            pl.lit(True).alias(f"present{suffix}"),
+        )
+
+    joined = side(before, "_1").join(
+        side(after, "_2"), on="name", how="full", coalesce=True
+    )
+    exprs = []
+    for suffix in ("_1", "_2"):
+        present = pl.col(f"present{suffix}").fill_null(False)
+        has_stats = pl.any_horizontal(
+            pl.col(f"{field}{suffix}").is_not_null() for field in STATS_FIELDS
+        )
+        exprs += [
+            present.alias(f"present{suffix}"),
+            pl.when(present)
+            .then(pl.col(f"result{suffix}"))
+            .otherwise(math.nan)
+            .alias(f"result{suffix}"),
+            has_stats.alias(f"has_stats{suffix}"),
+        ]
+    return joined.with_columns(exprs).sort("name")
 
 
 @dataclasses.dataclass(frozen=True)
@@ -130,12 +375,7 @@ class ASVBench:
     def from_prepared_result(cls, name: str, pr: PreparedResult) -> ASVBench:
         time = pr.results.get(name, math.nan)
         stats_entry = pr.stats.get(name)
-        if stats_entry and stats_entry[0]:
-            from asv_runner.statistics import get_err
-
-            err = get_err(time, stats_entry[0])
-        else:
-            err = None
+        err = pr.errs.get(name)
         version = pr.versions.get(name)
         unit = pr.units.get(name)
         return cls(
@@ -0,0 +1,257 @@
+"""Resident process answering comparison requests over HTTP.
+
+Requests run the same click commands as the command line, in-process, so
+their output is identical; what is saved is interpreter startup, imports
+and, through a shared ``MemoryCache`` and the memoized benchmarks.json
+metadata, parsing and preparing files which did not change.
+
+The server listens on localhost or on a Unix socket (only accessible to
+its owner) and handles one request at a time. ``POST /run`` takes a JSON
+object with the ``command`` (one of ``SERVED_COMMANDS``) and its ``args``,
+and answers with its ``exit_code``, ``stdout`` and ``stderr``. ``GET
+/health`` reports the number of prepared results held in memory.
+
+Since any local process or web page can reach localhost, requests must
+name a localhost ``Host`` and have a JSON ``Content-Type`` (which browsers
+do not send across origins without a preflight), and may only use the
+options in ``SERVED_OPTIONS``, none of which write files.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from asv_spyglass._cache import MemoryCache
+
+SERVED_COMMANDS = ("compare", "compare-many")
+SERVED_OPTIONS = {
+    "compare": frozenset(
+        [
+            "--factor",
+            "--split",
+            "--only-changed",
+            "--sort",
+            "--label-before",
+            "--label-after",
+            "--no-env-label",
+            "--only-improved",
+            "--only-regressed",
+            "--no-cache",
+            "--significance",
+            "--seed",
+            "--format",
+            "--top",
+            "--bench",
+            "-b",
+        ]
+    ),
+    "compare-many": frozenset(
+        [
+            "--bconf",
+            "--factor",
+            "--sort",
+            "--label",
+            "-l",
+            "--jobs",
+            "-j",
+            "--no-cache",
+            "--format",
+            "--summary",
+            "--worst",
+            "--bench",
+            "-b",
+        ]
+    ),
+}
+_LOCAL_HOSTS = frozenset(["localhost", "127.0.0.1", "[::1]"])
+
+
+def _unserved_option(command: str, args: list[str]) -> str | None:
+    """The first argument of ``args`` which looks like an option not served.
+
+    Values starting with ``-`` are taken for options too, erring on the side
+    of rejecting a request.
+    """
+    for arg in args:
+        if arg.startswith("-") and arg.split("=", 1)[0] not in SERVED_OPTIONS[command]:
+            return arg
+    return None
+
+
+def _is_local_host(host: str | None) -> bool:
+    """Whether the ``Host`` header names localhost, with or without a port."""
+    if not host:
+        return False
+    name, sep, port = host.rpartition(":")
+    if not sep or not port.isdigit():
+        name = host
+    return name.lower() in _LOCAL_HOSTS
+
+
+def run_command(command: str, args: list[str], cache: MemoryCache) -> dict:
+    """Run a command of the CLI with ``cache`` as its result cache."""
+    from asv_spyglass.cli import cli
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            cli.main([command, *args], prog_name="asv-spyglass", obj=cache)
+            exit_code = 0
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                exit_code = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if not _is_local_host(self.headers.get("Host")):
+            self._reply(403, {"error": "Host must be localhost"})
+            return
+        if self.path != "/health":
+            self._reply(404, {"error": f"Unknown path {self.path!r}"})
+            return
+        self._reply(200, {"status": "ok", "cached_results": len(self.server.cache)})
+
+    def do_POST(self) -> None:
+        # Read the body of rejected requests too, so the client can finish
+        # sending it and get the reply instead of a broken connection
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        except ValueError as exc:
+            self._reply(400, {"error": f"Bad request: {exc}"})
+            return
+        if not _is_local_host(self.headers.get("Host")):
+            self._reply(403, {"error": "Host must be localhost"})
+            return
+        if self.path != "/run":
+            self._reply(404, {"error": f"Unknown path {self.path!r}"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            request = json.loads(body)
+            command = request["command"]
+            args = request.get("args", [])
+            if not isinstance(args, list) or not all(
+                isinstance(arg, str) for arg in args
+            ):
+                raise TypeError("args must be a list of strings")
+        except (ValueError, KeyError, TypeError) as exc:
+            self._reply(400, {"error": f"Bad request: {exc}"})
+            return
+        if command not in SERVED_COMMANDS:
+            self._reply(400, {"error": f"Command {command!r} is not served"})
+            return
+        option = _unserved_option(command, args)
+        if option is not None:
+            self._reply(400, {"error": f"Option {option!r} is not served"})
+            return
+        self._reply(200, run_command(command, args, self.server.cache))
+
+
+class _TCPServer(HTTPServer):
+    def __init__(self, address, cache: MemoryCache, verbose: bool):
+        self.cache = cache
+        self.verbose = verbose
+        super().__init__(address, _Handler)
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+    def __init__(self, path: str, cache: MemoryCache, verbose: bool):
+        self.cache = cache
+        self.verbose = verbose
+        super().__init__(path, _Handler)
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+
+
+def make_server(
+    cache: MemoryCache,
+    socket_path: str | None = None,
+    port: int = 0,
+    verbose: bool = False,
+) -> socketserver.BaseServer:
+    """Server on the Unix socket at ``socket_path``, else on localhost:``port``.
+
+    A socket left behind by an earlier server is replaced. Call
+    ``serve_forever`` to start answering, and ``server_close`` when done.
+    """
+    if socket_path is None:
+        return _TCPServer(("127.0.0.1", port), cache, verbose)
+    try:
+        if stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    return _UnixServer(socket_path, cache, verbose)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float | None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def request(
+    address: str | tuple[str, int],
+    command: str,
+    args: list[str],
+    timeout: float | None = None,
+) -> dict:
+    """Send a request to a server at a Unix socket path or (host, port)."""
+    if isinstance(address, str):
+        conn = _UnixConnection(address, timeout)
+    else:
+        conn = http.client.HTTPConnection(*address, timeout=timeout)
+    try:
+        body = json.dumps({"command": command, "args": list(args)})
+        conn.request("POST", "/run", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        reply = json.loads(response.read())
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(reply.get("error", f"HTTP {response.status}"))
+    return reply
@@ -0,0 +1,174 @@
+"""Compare every machine/env of an ASV results tree between two commits."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from asv_spyglass._cache import ResultCache
+from asv_spyglass.compare import ResultPreparer, _compare_changes, _compare_table
+from asv_spyglass.history import scan_result_files
+
+
+@dataclass
+class TreePair:
+    """Result files of one machine/env at both commits, if present."""
+
+    machine: str
+    env: str
+    before: Path | None
+    after: Path | None
+
+    @property
+    def label(self) -> str:
+        return f"{self.machine}/{self.env}"
+
+
+@dataclass
+class PairReport:
+    """Outcome of comparing one ``TreePair``."""
+
+    pair: TreePair
+    table: str = ""
+    worsened: bool = False
+    improved: bool = False
+    error: str | None = None
+
+
+def result_files_for_commit(
+    results_dir: Path, commit: str
+) -> dict[tuple[str, str], Path]:
+    """``(machine, env)`` to the result file of ``commit`` under ``results_dir``.
+
+    asv names result files ``<first 8 characters of the hash>-<env>.json``, so
+    ``commit`` can be any prefix of the hash; a ``ValueError`` is raised when
+    a shorter one matches several commits of the same machine/env.
+    """
+    prefix = commit[:8]
+    found: dict[tuple[str, str], Path] = {}
+    for path in scan_result_files(results_dir):
+        head, sep, env = path.stem.partition("-")
+        if not sep or not head.startswith(prefix):
+            continue
+        key = (path.parent.name, env)
+        if key in found:
+            raise ValueError(
+                f"Commit {commit!r} matches both {found[key]} and {path}; "
+                "give more of the hash."
+            )
+        found[key] = path
+    return found
+
+
+def pair_result_files(
+    before_dir: Path, before_commit: str, after_dir: Path, after_commit: str
+) -> list[TreePair]:
+    """Pair the result files of two commits by machine and environment."""
+    before = result_files_for_commit(before_dir, before_commit)
+    after = result_files_for_commit(after_dir, after_commit)
+    pairs = []
+    for key in sorted(before.keys() | after.keys()):
+        machine, env = key
+        pairs.append(TreePair(machine, env, before.get(key), after.get(key)))
+    return pairs
+
+
+def compare_pair(
+    pair: TreePair,
+    preparer: ResultPreparer,
+    cache: ResultCache | None = None,
+    factor: float = 1.1,
+    only_changed: bool = False,
+    sort: str = "default",
+    only_improved: bool = False,
+    only_regressed: bool = False,
+) -> PairReport:
+    """Compare one pair of result files; errors are reported, not raised."""
+    report = PairReport(pair)
+    if pair.before is None or pair.after is None:
+        return report
+    try:
+        changes, _, _, report.worsened, report.improved = _compare_changes(
+            str(pair.before),
+            str(pair.after),
+            None,
+            factor,
+            True,
+            cache,
+            "asv",
+            0,
+            only_changed,
+            only_improved,
+            only_regressed,
+            preparer=preparer,
+        )
+        report.table = _compare_table(changes, "", False, sort, titles=False)
+    except Exception as exc:
+        report.error = str(exc)
+    return report
+
+
+_worker_state: tuple | None = None
+
+
+def _init_worker(preparer: ResultPreparer, cache, options: dict) -> None:
+    global _worker_state
+    _worker_state = (preparer, cache, options)
+
+
+def _compare_pair_worker(pair: TreePair) -> PairReport:
+    preparer, cache, options = _worker_state
+    return compare_pair(pair, preparer, cache, **options)
+
+
+def compare_tree(
+    pairs: list[TreePair],
+    preparer: ResultPreparer,
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+    **options,
+) -> list[PairReport]:
+    """Compare every pair, in order, with one shared ``preparer``.
+
+    ``jobs`` is the number of worker processes (0 for one per CPU, 1 to
+    compare in this process). ``options`` are passed on to ``compare_pair``.
+    """
+    if jobs == 1 or len(pairs) < 2:
+        return [compare_pair(pair, preparer, cache, **options) for pair in pairs]
+    # Polars is multithreaded, so use fresh interpreters rather than fork
+    with ProcessPoolExecutor(
+        max_workers=min(jobs or os.cpu_count() or 1, len(pairs)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(preparer, cache, options),
+    ) as pool:
+        return list(pool.map(_compare_pair_worker, pairs))
+
+
+def format_tree_report(reports: list[PairReport]) -> str:
+    """One section per machine/env, then a summary line."""
+    sections = []
+    for report in reports:
+        pair = report.pair
+        if pair.before is None or pair.after is None:
+            side = "before" if pair.after is None else "after"
+            sections.append(f"### {pair.label}\n\nOnly in {side}.")
+        elif report.error is not None:
+            sections.append(f"### {pair.label}\n\nError: {report.error}")
+        else:
+            heading = f"### {pair.label} ({pair.before.name} -> {pair.after.name})"
+            sections.append(f"{heading}\n\n{report.table or 'No changes.'}")
+
+    compared = [r for r in reports if r.pair.before and r.pair.after]
+    counts = [
+        f"{len(compared)} compared",
+        f"{sum(r.worsened for r in compared)} with regressions",
+        f"{sum(r.improved for r in compared)} with improvements",
+        f"{len(reports) - len(compared)} unpaired",
+        f"{sum(r.error is not None for r in compared)} failed",
+    ]
+    sections.append("Summary: " + ", ".join(counts) + ".")
+    return "\n\n".join(sections)
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_result_cache(tmp_path_factory, monkeypatch):
+    """Keep the CLI's on-disk result cache out of the user's cache directory."""
+    cache_dir = tmp_path_factory.mktemp("spyglass-cache")
+    monkeypatch.setenv("ASV_SPYGLASS_CACHE_DIR", str(cache_dir))
@@ -0,0 +1,70 @@
+import os
+import shutil
+
+from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass._cache import MemoryCache, ResultCache
+from asv_spyglass.compare import ResultPreparer, load_prepared
+
+
+def _setup(shared_datadir, tmp_path):
+    result = tmp_path / "result.json"
+    shutil.copy(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json", result)
+    preparer = ResultPreparer(
+        ReadOnlyASVBenchmarks(shared_datadir / "d6b286b8_asv_samples_benchmarks.json")
+    )
+    return str(result), preparer, ResultCache(tmp_path / "cache")
+
+
+def test_cache_roundtrip(shared_datadir, tmp_path):
+    result, preparer, cache = _setup(shared_datadir, tmp_path)
+    assert cache.get(result, preparer.identity) is None
+    prepared = load_prepared(result, preparer, cache)
+    cached = cache.get(result, preparer.identity)
+    assert cached is not None
+    assert cached.frame.equals(prepared.frame)
+    assert (cached.machine_name, cached.env_name) == (
+        prepared.machine_name,
+        prepared.env_name,
+    )
+
+
+def test_cache_invalidated_by_changes(shared_datadir, tmp_path):
+    result, preparer, cache = _setup(shared_datadir, tmp_path)
+    load_prepared(result, preparer, cache)
+    st = os.stat(result)
+    os.utime(result, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(result, preparer.identity) is None
+    # A different benchmarks selection is a different entry too
+    load_prepared(result, preparer, cache)
+    unfiltered = ResultPreparer(ReadOnlyASVBenchmarks(None))
+    assert cache.get(result, unfiltered.identity) is None
+
+
+def test_cache_lru_eviction(shared_datadir, tmp_path):
+    result, preparer, cache = _setup(shared_datadir, tmp_path)
+    load_prepared(result, preparer, cache)
+    (entry,) = cache.directory.glob("*.parquet")
+    cache.max_bytes = entry.stat().st_size
+    other = ResultPreparer(ReadOnlyASVBenchmarks(None))
+    load_prepared(result, other, cache)
+    assert cache.get(result, preparer.identity) is None
+    assert cache.get(result, other.identity) is not None
+
+
+def test_memory_cache_lru_and_invalidation(shared_datadir, tmp_path):
+    result, preparer, backing = _setup(shared_datadir, tmp_path)
+    other = tmp_path / "other.json"
+    shutil.copy(result, other)
+    cache = MemoryCache(backing, max_entries=1)
+    prepared = load_prepared(result, preparer, cache)
+    assert cache.get(result, preparer.identity) is prepared
+
+    load_prepared(str(other), preparer, cache)
+    assert len(cache) == 1
+    # Evicted from memory, but still on disk
+    assert cache.get(result, preparer.identity).frame.equals(prepared.frame)
+
+    st = os.stat(result)
+    os.utime(result, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(result, preparer.identity) is None
+    assert len(cache) == 0
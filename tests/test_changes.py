@@ -0,0 +1,225 @@
+import math
+import random
+
+import polars as pl
+import pytest
+
+from asv_spyglass._num import Ratio
+from asv_spyglass.changes import (
+    AFTER_IS_INFO,
+    AfterIs,
+    classify_changes,
+    classify_changes_incremental,
+    get_change_info,
+)
+from asv_spyglass.compare import _compare_many_frame
+from asv_spyglass.results import (
+    STATS_FIELDS,
+    ASVBench,
+    PreparedResult,
+    join_prepared,
+)
+
+
+def _synthetic_result(rng, names, env_name):
+    columns = {key: [] for key in ["benchmark_base", "name", "result", "units"]}
+    columns.update({key: [] for key in ["version", *STATS_FIELDS, "samples"]})
+    columns["_param_names"] = []
+    for name in names:
+        value = rng.choice(
+            [None, math.nan, 0.0, *(rng.uniform(1, 2) for _ in range(6))]
+        )
+        columns["benchmark_base"].append(name)
+        columns["name"].append(name)
+        columns["result"].append(value)
+        columns["units"].append("seconds")
+        columns["version"].append(rng.choice([None, "v1", "v1", "v1", "v2"]))
+        has_stats = value is not None and not math.isnan(value) and rng.random() < 0.8
+        spread = rng.uniform(0.01, 0.4)
+        for field, stat in zip(
+            STATS_FIELDS,
+            [
+                (value or 0) - spread,
+                (value or 0) + spread,
+                (value or 0) - spread / 2,
+                (value or 0) + spread / 2,
+                10,
+                rng.choice([1, 10, 10]),
+            ],
+        ):
+            columns[field].append(stat if has_stats else None)
+        samples = None
+        if has_stats and rng.random() < 0.5:
+            samples = [(value or 0) + rng.gauss(0, spread) for _ in range(8)]
+        columns["samples"].append(samples)
+        columns["_param_names"].append(None)
+    return PreparedResult.from_columns(columns, "machine", env_name)
+
+
+@pytest.mark.parametrize("use_stats", [True, False])
+def test_classify_changes_matches_get_change_info(use_stats):
+    rng = random.Random(42)
+    names = [f"bench_{i:03d}" for i in range(300)]
+    before = _synthetic_result(rng, names[:280], "env1")
+    after = _synthetic_result(rng, names[20:], "env2")
+
+    changes = classify_changes(join_prepared(before, after), 1.1, use_stats)
+
+    assert changes["name"].to_list() == names
+    for row in changes.iter_rows(named=True):
+        asv1 = ASVBench.from_prepared_result(row["name"], before)
+        asv2 = ASVBench.from_prepared_result(row["name"], after)
+        expected = get_change_info(asv1, asv2, 1.1, use_stats)
+        assert AFTER_IS_INFO[AfterIs(row["after_is"])] == expected, row["name"]
+        assert (row["err_1"], row["err_2"]) == (asv1.err, asv2.err)
+
+
+def test_compare_many_frame_matches_get_change_info():
+    rng = random.Random(11)
+    names = [f"bench_{i:03d}" for i in range(300)]
+    base = _synthetic_result(rng, names[:250], "env0")
+    contenders = [
+        _synthetic_result(rng, names[30:280], "env1"),
+        _synthetic_result(rng, names[60:], "env2"),
+    ]
+    matrix = _compare_many_frame(base, contenders, 1.1, True)
+
+    assert matrix["name"].to_list() == names
+    missing = ASVBench(math.nan, None, None, None)
+    base_benches = {
+        name: ASVBench.from_prepared_result(name, base) for name in base.results
+    }
+    for i, contender in enumerate(contenders, 1):
+        benches = {
+            name: ASVBench.from_prepared_result(name, contender)
+            for name in contender.results
+        }
+        for row in matrix.iter_rows(named=True):
+            asv1 = base_benches.get(row["name"], missing)
+            asv2 = benches.get(row["name"], missing)
+            expected = get_change_info(asv1, asv2, 1.1, True)
+            assert AFTER_IS_INFO[AfterIs(row[f"after_is_{i}"])] == expected
+            assert row[f"err_{i}"] == asv2.err
+            if None in (asv1.time, asv2.time):
+                assert row[f"ratio_na_{i}"]
+            else:
+                ratio = Ratio(asv1.time, asv2.time)
+                assert row[f"ratio_na_{i}"] == ratio.is_na
+                if not ratio.is_na:
+                    assert row[f"ratio_{i}"] == ratio.val
+
+
+def test_classify_changes_incremental_reuses_unchanged_rows():
+    rng = random.Random(7)
+    names = [f"bench_{i:03d}" for i in range(200)]
+    before = _synthetic_result(rng, names, "env1")
+    after = _synthetic_result(rng, names, "env2")
+    joined = join_prepared(before, after)
+
+    first = classify_changes_incremental(joined, None, 1.1)
+    expected = classify_changes(joined, 1.1)
+    assert first.drop("fingerprint").equals(expected)
+
+    # Reused rows come from the previous run as stored, so mark them
+    previous = first.with_columns(after_is=pl.lit("reused"))
+    moved = joined.with_columns(
+        result_2=pl.when(pl.col("name") == "bench_005")
+        .then(pl.col("result_2") * 3)
+        .otherwise(pl.col("result_2"))
+    )
+    second = classify_changes_incremental(moved, previous, 1.1)
+    assert second["name"].to_list() == names
+    redone = second.filter(pl.col("after_is") != "reused")["name"].to_list()
+    assert redone == (["bench_005"] if moved["result_2"][5] is not None else [])
+
+    # Other settings change every fingerprint
+    third = classify_changes_incremental(joined, previous, 1.2)
+    assert "reused" not in third["after_is"].to_list()
+
+
+def _sampled_result(samples_by_name, env_name):
+    columns = {"benchmark_base": [], "name": [], "result": [], "units": []}
+    columns.update({key: [] for key in ["version", *STATS_FIELDS, "samples"]})
+    columns["_param_names"] = []
+    for name, samples in samples_by_name.items():
+        ordered = sorted(samples)
+        median = ordered[len(ordered) // 2]
+        columns["benchmark_base"].append(name)
+        columns["name"].append(name)
+        columns["result"].append(median)
+        columns["units"].append("seconds")
+        columns["version"].append("v1")
+        for field, stat in zip(
+            STATS_FIELDS,
+            [ordered[0], ordered[-1], ordered[5], ordered[-6], 10, 10],
+        ):
+            columns[field].append(stat)
+        columns["samples"].append(samples)
+        columns["_param_names"].append(None)
+    return PreparedResult.from_columns(columns, "machine", env_name)
+
+
+@pytest.mark.parametrize("significance", ["mann-whitney", "bootstrap"])
+def test_classify_changes_sample_tests(significance):
+    rng = random.Random(7)
+    noise = [rng.gauss(0, 0.05) for _ in range(40)]
+    before = _sampled_result(
+        {
+            "bench_noisy": [1 + 8 * n for n in noise[:20]],
+            "bench_shifted": [1 + n for n in noise[:20]],
+        },
+        "env1",
+    )
+    after = _sampled_result(
+        {
+            "bench_noisy": [1.15 + 8 * n for n in noise[20:]],
+            "bench_shifted": [1.5 + n for n in noise[20:]],
+        },
+        "env2",
+    )
+    joined = join_prepared(before, after)
+
+    changes = classify_changes(joined, 1.1, significance=significance, seed=3)
+    assert changes["after_is"].to_list() == ["same", "worse"]
+    if significance == "mann-whitney":
+        assert changes["p_value"][1] < 0.002 < changes["p_value"][0]
+    else:
+        assert changes["ratio_ci_low"][0] < 1 < changes["ratio_ci_high"][0]
+        assert 1 < changes["ratio_ci_low"][1] < 1.5 < changes["ratio_ci_high"][1]
+    # Seeded, so reproducible
+    assert classify_changes(joined, 1.1, significance=significance, seed=3).equals(
+        changes
+    )
+
+
+def test_mann_whitney_normal_approximation():
+    from asv_spyglass._significance import mann_whitney
+
+    p_value, trusted = mann_whitney(
+        [list(range(21)), [1, 1, 2]], [list(range(21, 42)), [1, 1, 2]]
+    )
+    # U = 0 for the first pair: z = (220.5 - 0.5) / sqrt(441 * 43 / 12)
+    assert p_value[0] == pytest.approx(math.erfc(5.53426 / math.sqrt(2)), rel=1e-4)
+    assert p_value[1] == pytest.approx(1.0)
+    assert trusted.tolist() == [True, False]  # Too few samples to reach p < 0.002
+
+
+def test_mann_whitney_exact_matches_asv():
+    """Small samples get asv's exact p-values, ties broken the same way."""
+    from asv._stats import mann_whitney_u
+
+    from asv_spyglass._significance import mann_whitney
+
+    rng = random.Random(5)
+    samples_a, samples_b = [list(range(8))], [list(range(8, 16))]
+    for _ in range(200):
+        spread = rng.choice([3, 1000])
+        shift = rng.choice([0, 2, 5])
+        samples_a.append([rng.randint(0, spread) for _ in range(rng.randint(1, 20))])
+        samples_b.append(
+            [rng.randint(0, spread) + shift for _ in range(rng.randint(1, 20))]
+        )
+    p_value, _ = mann_whitney(samples_a, samples_b)
+    expected = [mann_whitney_u(a, b)[1] for a, b in zip(samples_a, samples_b)]
+    assert p_value.tolist() == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    assert p_value[0] == pytest.approx(2 / math.comb(16, 8))
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+from click.testing import CliRunner
+
+from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass.cli import cli
+from asv_spyglass.compare import ResultPreparer
+from asv_spyglass.history import ResultHistory
+
+
+def _results_tree(shared_datadir, tmp_path):
+    results = tmp_path / "results"
+    (results / "rgx1gen11").mkdir(parents=True)
+    for name in [
+        "a0f29428-conda-py3.11-numpy.json",
+        "d6b286b8-rattler-py3.12-numpy.json",
+    ]:
+        shutil.copy(shared_datadir / name, results / "rgx1gen11" / name)
+    (results / "rgx1gen11" / "machine.json").write_text("{}")
+    shutil.copy(
+        shared_datadir / "d6b286b8_asv_samples_benchmarks.json",
+        results / "benchmarks.json",
+    )
+    return results
+
+
+def _history(results, tmp_path):
+    benchmarks = ReadOnlyASVBenchmarks(results / "benchmarks.json")
+    return ResultHistory(results, ResultPreparer(benchmarks), tmp_path / "store")
+
+
+def test_history_update_is_incremental(shared_datadir, tmp_path):
+    results = _results_tree(shared_datadir, tmp_path)
+    history = _history(results, tmp_path)
+    update = history.update()
+    assert (update.added, update.removed, update.errors) == (2, 0, [])
+    df = history.to_df()
+    assert df["commit_hash"].str.slice(0, 8).unique().sort().to_list() == [
+        "a0f29428",
+        "d6b286b8",
+    ]
+    assert df["env"].unique().sort().to_list() == [
+        "conda-py3.11-numpy",
+        "rattler-py3.12-numpy",
+    ]
+
+    # Nothing new to read
+    assert history.update().added == 0
+    assert history.to_df().equals(df)
+
+    # One file replaced, one removed, one unreadable
+    machine_dir = results / "rgx1gen11"
+    changed = machine_dir / "a0f29428-conda-py3.11-numpy.json"
+    shutil.copy(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json", changed)
+    os.utime(changed, ns=(0, 0))
+    (machine_dir / "d6b286b8-rattler-py3.12-numpy.json").unlink()
+    (machine_dir / "broken.json").write_text("not json")
+    update = history.update()
+    assert (update.added, update.removed) == (1, 1)
+    assert [e.split(":")[0] for e in update.errors] == ["rgx1gen11/broken.json"]
+    assert history.to_df()["env"].unique().to_list() == ["virtualenv-py3.12-numpy"]
+
+
+def test_history_cli(shared_datadir, tmp_path):
+    results = _results_tree(shared_datadir, tmp_path)
+    out = tmp_path / "history.csv"
+    runner = CliRunner()
+    result = runner.invoke(cli, ["history", str(results), "--csv", str(out)])
+    assert result.exit_code == 0, result.output
+    header = out.read_text().splitlines()[0].split(",")
+    assert header[:6] == [
+        "name",
+        "benchmark_base",
+        "commit_hash",
+        "date",
+        "machine",
+        "env",
+    ]
+    assert "units" in header
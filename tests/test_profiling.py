@@ -0,0 +1,68 @@
+import json
+
+from click.testing import CliRunner
+
+from asv_spyglass.cli import cli
+from asv_spyglass.compare import do_compare
+from asv_spyglass.profiling import Profiler, add_hook, phase, remove_hook
+
+
+def test_phase_hooks():
+    records = []
+    with phase("unhooked"):
+        pass
+    hook = add_hook(records.append)
+    try:
+        with phase("outer", 3) as outer:
+            with phase("inner") as inner:
+                inner.items = 5
+            outer.items += 1
+    finally:
+        remove_hook(hook)
+    with phase("unhooked"):
+        pass
+    assert [(r.name, r.items) for r in records] == [("inner", 5), ("outer", 4)]
+    assert records[1].wall >= records[0].wall >= 0
+    assert records[1].peak_rss is None or records[1].peak_rss > 0
+
+
+def test_profiler_phases(shared_datadir):
+    with Profiler() as profiler:
+        do_compare(
+            shared_datadir / "a0f29428-conda-py3.11-numpy.json",
+            shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json",
+            shared_datadir / "asv_samples_a0f29428_benchmarks.json",
+        )
+    records = {rec["name"]: rec for rec in profiler.to_records()}
+    assert list(records) == [
+        "benchmarks",
+        "load",
+        "join",
+        "classify",
+        "format",
+        "render",
+        "total",
+    ]
+    assert records["load"]["calls"] == 2
+    assert records["load"]["items"] == 2 * records["format"]["items"]
+    assert records["total"]["wall"] >= records["load"]["wall"]
+
+
+def test_profile_cli(shared_datadir):
+    runner = CliRunner()
+    args = [
+        "compare",
+        str(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+        str(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json"),
+        str(shared_datadir / "asv_samples_a0f29428_benchmarks.json"),
+        "--no-cache",
+    ]
+    plain = runner.invoke(cli, args)
+    result = runner.invoke(cli, ["--profile", "--profile-format", "json", *args])
+    assert result.exit_code == plain.exit_code
+    assert result.stdout == plain.stdout
+    phases = [rec["name"] for rec in json.loads(result.stderr)]
+    assert phases == ["benchmarks", "load", "join", "classify", "render", "total"]
+
+    result = runner.invoke(cli, ["--profile", *args])
+    assert result.stderr.splitlines()[0].split()[:3] == ["|", "Phase", "|"]
@@ -1,19 +1,33 @@
+import io
+import json
+import math
 import pprint as pp
+import re
 import shutil
 
+import polars as pl
+import pytest
 from approvaltests.approvals import verify
 from asv import results
 from click.testing import CliRunner
 
 from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
 from asv_spyglass._aux import getstrform
+from asv_spyglass._stream import ResultStream
 from asv_spyglass.cli import cli
 from asv_spyglass.compare import (
     ResultPreparer,
+    _summarize_many,
+    compare_many_records,
+    compare_many_summary,
+    compare_records,
     do_compare,
     do_compare_many,
+    format_many_summary,
     result_iter,
+    stream_compare,
 )
+from asv_spyglass.results import PreparedResult
 
 
 def test_result_iter(shared_datadir):
@@ -164,6 +178,23 @@ def test_to_df_auto_search(shared_datadir, tmp_path):
     assert "sec" in result.output  # units from benchmarks.json
 
 
+def test_to_df_trailing_bconf(shared_datadir, tmp_path):
+    """A trailing metadata file is recognized by content, not by its name."""
+    result_file = shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    runner = CliRunner()
+    result = runner.invoke(cli, ["to-df", str(result_file), str(bconf)])
+    assert result.exit_code == 0, result.output
+    assert "shape: (16, 17)" in result.output
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("{}")
+    result = runner.invoke(cli, ["to-df", str(result_file), str(bad)])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, SystemExit)
+    assert "Error loading" in result.output
+
+
 def test_do_compare_many(shared_datadir):
     """compare-many works with multiple result files (GH-3)."""
     output = do_compare_many(
@@ -191,3 +222,468 @@ def test_do_compare_many_no_bconf(shared_datadir):
     assert "benchmarks.TimeSuite.time_add_arr" in output
     # Check for formatted float without units
     assert "3.4e-05" in output
+
+
+def test_prepare_prefix_keys(shared_datadir):
+    """Metadata lookup is exact, even when one key is a prefix of another."""
+    res = results.Results.load(
+        getstrform(shared_datadir / "a0f29428-conda-py3.11-numpy.json")
+    )
+    key = "benchmarks.TimeSuite.time_add_arr"
+    benchmarks = {
+        f"{key}_long(1)": {"name": f"{key}_long", "unit": "bytes"},
+        key: {"name": key, "unit": "seconds", "param_names": []},
+    }
+    prepared = ResultPreparer(benchmarks).prepare(res)
+    assert prepared.units[key] == "seconds"
+    assert prepared.param_names[key] == []
+
+
+def test_parameter_named_names(shared_datadir, tmp_path):
+    """A parameter called ``names`` does not shadow the list of names."""
+    bconf = json.loads(
+        (shared_datadir / "d6b286b8_asv_samples_benchmarks.json").read_text()
+    )
+    bconf["benchmarks.time_sort"]["param_names"] = ["names"]
+    bconf_path = tmp_path / "benchmarks.json"
+    bconf_path.write_text(json.dumps(bconf))
+    after = getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json")
+    prepared = ResultPreparer(ReadOnlyASVBenchmarks(bconf_path)).prepare(
+        results.Results.load(after)
+    )
+    assert prepared.param_names["benchmarks.time_sort(10)"] == ["names"]
+    exported = prepared.to_df().filter(
+        pl.col("benchmark_base") == "benchmarks.time_sort"
+    )
+    assert exported["param_names"].to_list() == ["10", "100"]
+    restored = PreparedResult.from_frame(prepared.to_df())
+    assert restored.param_names["benchmarks.time_sort(100)"] == ["names"]
+
+    before = getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json")
+    records, *_ = compare_records(before, after, bconf_path, bench="time_sort")
+    assert [r["params"] for r in records] == [{"names": "10"}, {"names": "100"}]
+
+
+def test_prepared_result_views(shared_datadir):
+    """Dict-style accessors on the columnar PreparedResult match result_iter."""
+    res = results.Results.load(
+        getstrform(shared_datadir / "a0f29428-conda-py3.11-numpy.json")
+    )
+    prepared = ResultPreparer({}).prepare(res)
+    (record,) = result_iter(res)
+    name = record.key
+    assert list(prepared.results) == [name]
+    assert prepared.results[name] == record.value[0]
+    assert prepared.stats[name] == (record.stats[0], None)
+    assert prepared.versions[name] == record.version
+    assert prepared.units.get(name) is None
+    assert prepared.frame.schema["samples"] == pl.List(pl.Float64)
+
+
+def test_do_compare_many_jobs(shared_datadir):
+    """compare-many output does not depend on the number of loader processes."""
+    args = (
+        getstrform(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+        [
+            getstrform(shared_datadir / "a0f29428-conda-py3.11.json"),
+            getstrform(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json"),
+            getstrform(shared_datadir / "a0f29428-virtualenv-py3.12.json"),
+        ],
+        shared_datadir / "asv_samples_a0f29428_benchmarks.json",
+    )
+    assert do_compare_many(*args, jobs=2) == do_compare_many(*args)
+
+
+def test_compare_many_reports_bad_files(shared_datadir, tmp_path):
+    """Every result file that fails to load is named in the error."""
+    bad = [tmp_path / "bad1.json", tmp_path / "bad2.json"]
+    for path in bad:
+        path.write_text("{}")
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "compare-many",
+            "--jobs",
+            "2",
+            str(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+            *map(str, bad),
+        ],
+    )
+    assert result.exit_code == 1
+    for path in bad:
+        assert str(path) in result.output
+
+
+def test_result_stream_matches_result_iter(shared_datadir):
+    """ResultStream yields the same records as result_iter on a loaded file."""
+    for path in shared_datadir.glob("*-*.json"):
+        expected = list(result_iter(results.Results.load(getstrform(path))))
+        # A tiny chunk size exercises values split across reads
+        assert list(ResultStream(path, chunk_size=7)) == expected
+        stream = ResultStream(path, samples=False)
+        assert all(set(rec.samples) == {None} for rec in stream)
+        assert stream.commit_hash == results.Results.load(getstrform(path)).commit_hash
+
+
+def test_to_df_export_feeds_compare(shared_datadir, tmp_path):
+    """to-df Parquet/Arrow exports compare the same as the JSON results."""
+    before = shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"
+    after = shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["to-df", str(before), str(after), str(bconf)]
+        + ["--parquet", str(tmp_path / "pq"), "--arrow", str(tmp_path / "ar")],
+    )
+    assert result.exit_code == 0, result.output
+    assert pl.scan_parquet(tmp_path / "pq").collect().height == 32
+
+    machine_dir = "machine=rgx1gen11"
+    exported_before = (
+        tmp_path / "pq" / machine_dir / "env=rattler-py3.12-numpy" / before.name
+    ).with_suffix(".parquet")
+    exported_after = (
+        tmp_path / "ar" / machine_dir / "env=virtualenv-py3.12-numpy" / after.name
+    ).with_suffix(".arrow")
+    expected = do_compare(getstrform(before), getstrform(after), bconf)
+    assert do_compare(str(exported_before), str(exported_after), None) == expected
+
+
+def test_compare_records_match_table(shared_datadir):
+    """Records carry the same changes as the table, and stream as NDJSON."""
+    args = (
+        getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"),
+        getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"),
+        shared_datadir / "d6b286b8_asv_samples_benchmarks.json",
+    )
+    records, worsened, improved = compare_records(*args, only_changed=True)
+    records = list(records)
+    table, *flags = do_compare(*args, only_changed=True)
+    assert flags == [worsened, improved] == [True, True]
+    assert {r["change"] for r in records} <= {"better", "worse"}
+    for record in records:
+        assert record["name"] in table
+    params = {r["name"]: r["params"] for r in records}
+    assert all(p is None or p for p in params.values())
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["compare", *map(str, args), "--only-changed", "--format", "ndjson"],
+    )
+    assert result.exit_code == 1
+    assert [json.loads(line) for line in result.output.splitlines()] == records
+
+
+def test_compare_many_records(shared_datadir):
+    """compare-many --format json emits one record per benchmark."""
+    args = [
+        getstrform(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+        getstrform(shared_datadir / "a0f29428-conda-py3.11.json"),
+        getstrform(shared_datadir / "a0f29428-virtualenv-py3.12.json"),
+    ]
+    bconf = shared_datadir / "asv_samples_a0f29428_benchmarks.json"
+    records = list(compare_many_records(args[0], args[1:], bconf))
+    assert [r["name"] for r in records] == sorted(r["name"] for r in records)
+    assert all(len(r["contenders"]) == 2 for r in records)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["compare-many", *args, "--bconf", str(bconf), "--format", "json"]
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == records
+
+
+def test_significant_is_the_same_in_both_commands(shared_datadir):
+    """``significant`` is the statistical test's outcome for compare-many too."""
+    before = getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json")
+    after = getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json")
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    records, *_ = compare_records(before, after, bconf)
+    expected = {r["name"]: r["significant"] for r in records}
+    many = compare_many_records(before, [after], bconf)
+    assert {r["name"]: r["contenders"][0]["significant"] for r in many} == expected
+    assert set(expected.values()) == {True, False}
+
+    runner = CliRunner()
+    results = {}
+    for command, args in [
+        ("compare", [before, after, str(bconf)]),
+        ("compare-many", [before, after, "--bconf", str(bconf)]),
+    ]:
+        result = runner.invoke(cli, [command, *args, "--format", "json"])
+        assert result.exception is None or isinstance(result.exception, SystemExit)
+        results[command] = json.loads(result.output)
+    assert {r["name"]: r["significant"] for r in results["compare"]} == expected
+    assert {
+        r["name"]: r["contenders"][0]["significant"] for r in results["compare-many"]
+    } == expected
+    with pytest.raises(ValueError, match="Unknown 'sort'"):
+        list(compare_many_records(before, [after], bconf, sort="ratio"))
+
+
+def test_compare_many_summary(shared_datadir):
+    """compare-many --summary aggregates each contender's ratios."""
+    args = [
+        getstrform(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+        getstrform(shared_datadir / "a0f29428-conda-py3.11.json"),
+        getstrform(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json"),
+    ]
+    bconf = shared_datadir / "asv_samples_a0f29428_benchmarks.json"
+    records = list(compare_many_records(args[0], args[1:], bconf))
+    summary = compare_many_summary(args[0], args[1:], bconf, worst=1)
+    for i, contender in enumerate(summary):
+        cells = [record["contenders"][i] for record in records]
+        ratios = sorted(
+            ((c["ratio"], r["name"]) for c, r in zip(cells, records) if c["ratio"]),
+            reverse=True,
+        )
+        assert contender["env"] == cells[0]["env"]
+        assert contender["compared"] == len(ratios)
+        changes = [c["change"] for c in cells]
+        assert contender["improved"] == sum(c in ("better", "fixed") for c in changes)
+        assert contender["regressed"] == sum(c in ("worse", "failed") for c in changes)
+        assert contender["worst"] == [{"name": ratios[0][1], "ratio": ratios[0][0]}]
+        geomean = math.exp(sum(math.log(r) for r, _ in ratios) / len(ratios))
+        assert contender["geomean_ratio"] == pytest.approx(geomean)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["compare-many", *args, "--bconf", str(bconf), "--summary", "--worst", "1"],
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == format_many_summary(summary) + "\n"
+
+
+def _with_failure(src, dst, name):
+    """Copy the result file ``src`` to ``dst`` with the first result of
+    ``name`` failed."""
+    data = json.loads(src.read_text())
+    data["results"][name][0][0] = None
+    dst.write_text(json.dumps(data))
+    return getstrform(dst)
+
+
+def test_compare_many_summary_counts_failures(shared_datadir, tmp_path):
+    """Failed benchmarks count as regressed and fixed ones as improved."""
+    baseline = _with_failure(
+        shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json",
+        tmp_path / "baseline.json",
+        "benchmarks.TimeSuiteDecoratorSingle.time_keys",
+    )
+    contender = _with_failure(
+        shared_datadir / "d6b286b8-rattler-py3.12-numpy.json",
+        tmp_path / "contender.json",
+        "benchmarks.time_sort",
+    )
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    records = list(compare_many_records(baseline, [contender], bconf))
+    changes = {r["name"]: r["contenders"][0]["change"] for r in records}
+    assert changes["benchmarks.TimeSuiteDecoratorSingle.time_keys(10)"] == "fixed"
+    assert changes["benchmarks.time_sort(10)"] == "failed"
+
+    [summary] = compare_many_summary(baseline, [contender], bconf)
+    counts = {c: list(changes.values()).count(c) for c in set(changes.values())}
+    assert summary["improved"] == counts["better"] + 1
+    assert summary["regressed"] == counts["worse"] + 1
+
+
+def test_compare_many_summary_worst_ties():
+    """Benchmarks with the same ratio are listed in name order."""
+    names = [f"bench_{i:04d}" for i in range(1000)]
+    matrix = pl.DataFrame(
+        {
+            "name": names,
+            "ratio_1": [2.0] * len(names),
+            "after_is_1": ["worse"] * len(names),
+            "ratio_na_1": [False] * len(names),
+        }
+    )
+    [summary] = _summarize_many(matrix, ["baseline", "contender"], len(names))
+    assert [w["name"] for w in summary["worst"]] == names
+
+
+def test_stream_compare_matches_table(shared_datadir):
+    """The streamed table has the same cells as the tabulated one."""
+    args = (
+        getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"),
+        getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"),
+        shared_datadir / "d6b286b8_asv_samples_benchmarks.json",
+    )
+    out = io.StringIO()
+    flags = stream_compare(*args, out, only_changed=True)
+    table, *expected_flags = do_compare(*args, only_changed=True)
+    assert list(flags) == expected_flags
+
+    def cell(text):
+        # tabulate reformats numbers, e.g. "0.90" as "0.9"
+        try:
+            return float(text)
+        except ValueError:
+            return text.strip()
+
+    def cells(text):
+        return [
+            [cell(text) for text in line.split("|")[1:-1]]
+            for line in text.splitlines()
+            if line.startswith("|") and not line.startswith("|-")
+        ]
+
+    assert cells(out.getvalue()) == cells(table)
+    widths = {len(line.rsplit("|", 2)[0]) for line in out.getvalue().splitlines()}
+    assert len(widths) == 1
+
+
+def test_compare_state_reuses_rows(shared_datadir, tmp_path):
+    """Comparing with --state gives the same output, and keeps the state."""
+    args = [
+        str(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"),
+        str(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"),
+        str(shared_datadir / "d6b286b8_asv_samples_benchmarks.json"),
+    ]
+    state = tmp_path / "state.parquet"
+    runner = CliRunner()
+    expected = runner.invoke(cli, ["compare", *args]).output
+    for _ in range(2):
+        result = runner.invoke(cli, ["compare", *args, "--state", str(state)])
+        assert result.exit_code == 1
+        assert result.output == expected
+    stored = pl.read_parquet(state)
+    assert stored["cells"].null_count() == 0
+    assert stored.height == expected.count("benchmarks.")
+
+
+def test_compare_top_and_ratio_sort(shared_datadir):
+    """--sort ratio orders numerically, and --top keeps the extreme changes."""
+    args = (
+        getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"),
+        getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"),
+        shared_datadir / "d6b286b8_asv_samples_benchmarks.json",
+    )
+    records, *flags = compare_records(*args, sort="ratio")
+    records = list(records)
+    ratios = [r["ratio"] for r in records if r["ratio"] is not None]
+    assert ratios == sorted(ratios, reverse=True)
+    assert all(r["ratio"] is None for r in records[len(ratios) :])
+
+    top, *top_flags = compare_records(*args, top=2)
+    top = list(top)
+    assert top_flags == flags
+    worse = [r for r in records if r["change"] == "worse"][:2]
+    better = [r for r in records if r["change"] == "better"][::-1][:2]
+    assert top == worse + better
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["compare", *map(str, args), "--top", "2"])
+    assert result.exit_code == 1
+    assert [
+        line.split("|")[4].strip()
+        for line in result.output.splitlines()
+        if "benchmarks." in line
+    ] == [f"{r['ratio']:.2f}" for r in better + worse]
+
+
+def test_compare_top_keeps_failures(shared_datadir, tmp_path):
+    """--top lists every failed and fixed benchmark, which have no ratio."""
+    before = _with_failure(
+        shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json",
+        tmp_path / "before.json",
+        "benchmarks.TimeSuiteDecoratorSingle.time_keys",
+    )
+    after = _with_failure(
+        shared_datadir / "d6b286b8-rattler-py3.12-numpy.json",
+        tmp_path / "after.json",
+        "benchmarks.time_sort",
+    )
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    records, *flags = compare_records(before, after, bconf, sort="ratio")
+    records = list(records)
+    top, *top_flags = compare_records(before, after, bconf, top=1)
+    assert top_flags == flags
+    assert [(r["name"], r["change"]) for r in top] == [
+        ("benchmarks.time_sort(10)", "failed"),
+        *[(r["name"], r["change"]) for r in records if r["change"] == "worse"][:1],
+        ("benchmarks.TimeSuiteDecoratorSingle.time_keys(10)", "fixed"),
+        *[(r["name"], r["change"]) for r in records if r["change"] == "better"][-1:],
+    ]
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["compare", before, after, str(bconf), "--top", "1", "--only-regressed"],
+    )
+    assert result.exit_code == 1
+    assert "benchmarks.time_sort(10)" in result.output
+
+
+def test_bench_selects_at_load(shared_datadir, tmp_path):
+    """--bench prepares only matching benchmarks, from any kind of input."""
+    before = shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json"
+    after = shared_datadir / "d6b286b8-rattler-py3.12-numpy.json"
+    bconf = shared_datadir / "d6b286b8_asv_samples_benchmarks.json"
+    bench = ["time_sort", r"Decorator.*\(10\b"]
+    pattern = re.compile("|".join(bench))
+    records, *_ = compare_records(str(before), str(after), bconf)
+    expected = [r for r in records if pattern.search(r["name"])]
+    selected, *selected_flags = compare_records(
+        str(before), str(after), bconf, bench=bench
+    )
+    assert list(selected) == expected
+    changes = {r["change"] for r in expected}
+    assert selected_flags == ["worse" in changes, "better" in changes]
+
+    preparer = ResultPreparer(ReadOnlyASVBenchmarks(bconf), bench)
+    streamed = preparer.prepare(preparer.stream(after)).to_df()
+    loaded = preparer.prepare(results.Results.load(getstrform(after))).to_df()
+    assert streamed.drop("samples").equals(loaded.drop("samples"))
+    assert sorted(streamed["name"]) == sorted(r["name"] for r in expected)
+    assert preparer.identity != ResultPreparer(ReadOnlyASVBenchmarks(bconf)).identity
+
+    runner = CliRunner()
+    args = [str(after), str(bconf), "--no-cache"]
+    result = runner.invoke(cli, ["to-df", *args, "--parquet", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    exported = next(tmp_path.rglob("*.parquet"))
+    result = runner.invoke(
+        cli,
+        ["compare", str(exported), str(after), "--no-cache", "--format", "json"]
+        + [arg for reg in bench for arg in ("--bench", reg)],
+    )
+    assert result.exit_code == 0, result.output
+    assert [r["name"] for r in json.loads(result.output)] == [
+        r["name"] for r in expected
+    ]
+    result = runner.invoke(cli, ["compare", str(before), str(after), "-b", "nomatch"])
+    assert (result.exit_code, result.output) == (0, "")
+
+
+def test_bench_matches_several_parameters(shared_datadir):
+    """A --bench regex may span parameters, as they appear in the names."""
+    before = getstrform(shared_datadir / "d6b286b8-virtualenv-py3.12-numpy.json")
+    after = getstrform(shared_datadir / "d6b286b8-rattler-py3.12-numpy.json")
+    bconf = str(shared_datadir / "d6b286b8_asv_samples_benchmarks.json")
+    expected = [
+        "benchmarks.TimeSuiteMultiDecorator.time_ranges(10, 'arange')",
+        "benchmarks.time_ranges_multi(10, 'arange')",
+    ]
+    runner = CliRunner()
+    for no_cache in ([], ["--no-cache"]):
+        result = runner.invoke(
+            cli,
+            ["compare", before, after, bconf, "-b", "10, 'arange'", "--format", "json"]
+            + no_cache,
+        )
+        assert result.exit_code == 1, result.output
+        assert [r["name"] for r in json.loads(result.output)] == expected
+        result = runner.invoke(
+            cli,
+            ["compare-many", before, after, "--bconf", bconf, "--format", "ndjson"]
+            + ["-b", "10, 'arange'", *no_cache],
+        )
+        assert result.exit_code == 0, result.output
+        names = [json.loads(line)["name"] for line in result.output.splitlines()]
+        assert names == expected
@@ -1,8 +1,19 @@
+import os
 import pprint as pp
+import re
+import shutil
 
+import pytest
 from approvaltests.approvals import verify
 
-from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass import _asv_ro
+from asv_spyglass._asv_ro import (
+    BenchmarkFilter,
+    BenchmarkIndex,
+    ReadOnlyASVBenchmarks,
+    expand_names,
+    load_benchmarks,
+)
 
 
 def test_ro_benchmarks(shared_datadir):
@@ -17,3 +28,88 @@ def test_ro_benchmarks_filter(shared_datadir):
         shared_datadir / "d6b286b8_asv_samples_benchmarks.json", "multi"
     )
     verify(pp.pformat(benchmarks))
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [
+        ["time_b1[78]"],
+        [r"time_b17\b"],
+        ["'v17'"],
+        ["v1.*x", r"0\)$"],
+        ["(?i)NONE", "b1"],
+        ["'a', 10"],
+        ["', 20, 'v1x'"],
+        [" 'v1x'"],
+        ["'b1' "],
+        [" 20,"],
+        ["'a', 10 "],
+    ],
+)
+def test_benchmark_filter_matches_search(regex):
+    params = [["'a'", "'b1'", "'v17'", "None"], ["10", "20"], ["'v1x'"]]
+    compiled = [re.compile(reg) for reg in regex]
+    bfilter = BenchmarkFilter(regex)
+    for name in ["bench.time_a", "bench.time_b17", "suite.peakmem_v1"]:
+        expected = [
+            idx
+            for idx, full in enumerate(expand_names(name, params))
+            if any(reg.search(full) for reg in compiled)
+        ]
+        assert list(bfilter.select(name, params)) == expected
+
+
+def test_benchmark_filter_across_separator():
+    """A literal following a parameter separator does not include its space."""
+    assert list(
+        BenchmarkFilter(["1, 2"]).select("bench", [["1", "3"], ["2", "4"]])
+    ) == [0]
+
+
+def test_benchmark_index_lookup():
+    index = BenchmarkIndex()
+    plain = {"name": "bench.time_plain"}
+    grid = {"name": "bench.time_grid"}
+    params = [["'a, b'", "'a'"], ["1", "2", "3"]]
+    index.add(plain, [], range(1))
+    index.add(grid, params, [1, 3, 5])
+    assert list(index) == [
+        "bench.time_plain",
+        "bench.time_grid('a, b', 2)",
+        "bench.time_grid('a', 1)",
+        "bench.time_grid('a', 3)",
+    ]
+    assert len(index) == 4
+    assert index["bench.time_grid('a', 3)"] is grid
+    assert index["bench.time_plain"] is plain
+    assert "bench.time_grid('a', 2)" not in index  # Not selected
+    assert "bench.time_grid('b', 1)" not in index
+    assert "bench.time_grid" not in index
+    assert index.base_index == {"bench.time_plain": plain, "bench.time_grid": grid}
+
+
+def test_load_benchmarks_memoized(shared_datadir, tmp_path, monkeypatch):
+    path = tmp_path / "benchmarks.json"
+    shutil.copy(shared_datadir / "d6b286b8_asv_samples_benchmarks.json", path)
+    cache_dir = tmp_path / "cache"
+    expected = dict(ReadOnlyASVBenchmarks(path, "multi").benchmarks)
+
+    first = load_benchmarks(path, "multi", cache_dir)
+    assert dict(first.benchmarks) == expected
+    assert load_benchmarks(path, "multi", cache_dir) is first
+    assert load_benchmarks(path, None, cache_dir) is not first
+
+    # A new process loads the compiled form, without parsing the JSON
+    with monkeypatch.context() as m:
+        m.setattr(_asv_ro, "_loaded", type(_asv_ro._loaded)())
+        m.setattr(ReadOnlyASVBenchmarks, "__init__", None)
+        compiled = load_benchmarks(path, "multi", cache_dir)
+    assert compiled is not first
+    assert dict(compiled.benchmarks) == expected
+
+    # A changed file is loaded afresh
+    os.utime(path, ns=(0, 0))
+    changed = load_benchmarks(path, "multi", cache_dir)
+    assert changed is not first
+    assert changed.identity != first.identity
+    assert len(list((cache_dir / "benchmarks").iterdir())) == 3
@@ -0,0 +1,98 @@
+import http.client
+import json
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from asv_spyglass import serve
+from asv_spyglass._cache import MemoryCache
+from asv_spyglass.cli import cli
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def server_address(request, tmp_path):
+    socket_path = str(tmp_path / "spyglass.sock") if request.param == "unix" else None
+    server = serve.make_server(MemoryCache(), socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path or server.server_address[:2]
+    server.shutdown()
+    server.server_close()
+
+
+def test_serve_matches_cli(shared_datadir, server_address):
+    runner = CliRunner()
+    requests = [
+        (
+            "compare",
+            [
+                str(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+                str(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json"),
+                str(shared_datadir / "asv_samples_a0f29428_benchmarks.json"),
+                "--split",
+            ],
+        ),
+        (
+            "compare-many",
+            [
+                str(shared_datadir / "a0f29428-conda-py3.11-numpy.json"),
+                str(shared_datadir / "a0f29428-virtualenv-py3.12-numpy.json"),
+                "--format",
+                "ndjson",
+            ],
+        ),
+    ]
+    for command, args in requests * 2:
+        expected = runner.invoke(cli, [command, *args])
+        reply = serve.request(server_address, command, args)
+        assert reply["exit_code"] == expected.exit_code
+        assert reply["stdout"] == expected.stdout
+
+    reply = serve.request(server_address, "compare", ["missing.json", "missing.json"])
+    assert reply["exit_code"] == 2
+    assert "does not exist" in reply["stderr"]
+    with pytest.raises(RuntimeError, match="not served"):
+        serve.request(server_address, "serve", [])
+
+
+def _post(server_address, body, headers):
+    if isinstance(server_address, str):
+        conn = serve._UnixConnection(server_address, None)
+    else:
+        conn = http.client.HTTPConnection(*server_address)
+    try:
+        conn.putrequest("POST", "/run", skip_host="Host" in headers)
+        for header, value in headers.items():
+            conn.putheader(header, value)
+        conn.putheader("Content-Length", str(len(body)))
+        conn.endheaders(body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_serve_rejects_unsafe_requests(shared_datadir, server_address):
+    bench = str(shared_datadir / "a0f29428-conda-py3.11-numpy.json")
+    body = json.dumps({"command": "compare", "args": [bench, bench]}).encode()
+
+    status, reply = _post(server_address, body, {"Content-Type": "application/json"})
+    assert status == 200
+    assert reply["exit_code"] == 0
+    status, reply = _post(
+        server_address, body, {"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert status == 415
+    status, reply = _post(
+        server_address,
+        body,
+        {"Host": "attacker.example:8470", "Content-Type": "application/json"},
+    )
+    assert status == 403
+
+    state = shared_datadir / "state.parquet"
+    for args in (["--state", str(state)], [f"--state={state}"]):
+        with pytest.raises(RuntimeError, match="'--state.*' is not served"):
+            serve.request(server_address, "compare", [bench, bench, *args])
+    assert not state.exists()
@@ -0,0 +1,41 @@
+import re
+import subprocess
+import sys
+
+# Cumulative import time of asv_spyglass.cli, in microseconds. Importing it
+# takes well under 100ms once the heavy dependencies are deferred, against
+# roughly 750ms when they were imported eagerly.
+IMPORT_BUDGET_US = 250_000
+
+
+def _import_cli(*flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [
+            sys.executable,
+            *flags,
+            "-c",
+            "import sys, asv_spyglass.cli; print(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_cli_defers_heavy_imports():
+    loaded = set(_import_cli().stdout.split())
+    for module in ["polars", "asv", "asv_runner", "tabulate", "asv_spyglass.compare"]:
+        assert module not in loaded
+
+
+def test_cli_import_time_budget():
+    timings = [
+        int(match.group(1))
+        for match in re.finditer(
+            r"^import time:\s+\d+ \|\s+(\d+) \| asv_spyglass\.cli$",
+            _import_cli("-X", "importtime").stderr,
+            re.MULTILINE,
+        )
+    ]
+    assert len(timings) == 1
+    assert timings[0] < IMPORT_BUDGET_US
@@ -0,0 +1,29 @@
+from click.testing import CliRunner
+
+from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass.cli import cli
+from asv_spyglass.compare import ResultPreparer, compare_records, load_prepared
+from benchmarks.synthetic import write_suite
+
+
+def test_synthetic_suite_compares(tmp_path):
+    """The benchmark suite's generated files are valid ASV results."""
+    suite = write_suite(tmp_path, n_benchmarks=20, grid=3, samples=True)
+    benchmarks = ReadOnlyASVBenchmarks(suite.benchmarks)
+    assert len(benchmarks.filtered_benchmarks) == 20 * 3 * 3
+    prepared = load_prepared(str(suite.baseline), ResultPreparer(benchmarks))
+    assert prepared.to_df().height == 20 * 3 * 3
+
+    records, worsened, improved = compare_records(
+        str(suite.baseline), str(suite.contenders[0]), suite.benchmarks
+    )
+    assert len(list(records)) == 20 * 3 * 3
+    assert worsened and improved
+
+    # benchmarks.json is found next to the machine directory
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["compare", str(suite.baseline), str(suite.contenders[0])]
+    )
+    assert result.exit_code == 1
+    assert "machine/env0 -> machine/env1" in result.output
@@ -0,0 +1,71 @@
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from asv_spyglass._asv_ro import ReadOnlyASVBenchmarks
+from asv_spyglass.cli import cli
+from asv_spyglass.compare import ResultPreparer
+from asv_spyglass.tree import compare_tree, format_tree_report, pair_result_files
+
+BEFORE = "aaaaaaaa11"
+AFTER = "bbbbbbbb22"
+
+
+def _results_tree(shared_datadir, tmp_path):
+    results = tmp_path / "results"
+    machine = results / "rgx1gen11"
+    machine.mkdir(parents=True)
+    files = {
+        "aaaaaaaa-py3.12.json": "d6b286b8-virtualenv-py3.12-numpy.json",
+        "bbbbbbbb-py3.12.json": "d6b286b8-rattler-py3.12-numpy.json",
+        "aaaaaaaa-py3.11.json": "a0f29428-conda-py3.11-numpy.json",
+        "bbbbbbbb-broken.json": None,
+        "aaaaaaaa-broken.json": "a0f29428-conda-py3.11.json",
+    }
+    for name, source in files.items():
+        if source is None:
+            (machine / name).write_text("{}")
+        else:
+            shutil.copy(shared_datadir / source, machine / name)
+    (machine / "machine.json").write_text("{}")
+    shutil.copy(
+        shared_datadir / "d6b286b8_asv_samples_benchmarks.json",
+        results / "benchmarks.json",
+    )
+    return results
+
+
+def test_pair_result_files(shared_datadir, tmp_path):
+    results = _results_tree(shared_datadir, tmp_path)
+    pairs = pair_result_files(results, BEFORE, results, AFTER)
+    assert [(p.label, bool(p.before), bool(p.after)) for p in pairs] == [
+        ("rgx1gen11/broken", True, True),
+        ("rgx1gen11/py3.11", True, False),
+        ("rgx1gen11/py3.12", True, True),
+    ]
+    with pytest.raises(ValueError, match="matches both"):
+        pair_result_files(results, "", results, AFTER)
+
+
+def test_compare_tree(shared_datadir, tmp_path):
+    results = _results_tree(shared_datadir, tmp_path)
+    pairs = pair_result_files(results, BEFORE, results, AFTER)
+    preparer = ResultPreparer(ReadOnlyASVBenchmarks(results / "benchmarks.json"))
+    reports = compare_tree(pairs, preparer)
+    assert [(r.worsened, r.error is not None) for r in reports] == [
+        (False, True),
+        (False, False),
+        (True, False),
+    ]
+    report = format_tree_report(reports)
+    assert report.endswith(
+        "Summary: 2 compared, 1 with regressions, 1 with improvements, "
+        "1 unpaired, 1 failed."
+    )
+    assert format_tree_report(compare_tree(pairs, preparer, jobs=2)) == report
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["compare-tree", str(results), BEFORE, AFTER])
+    assert result.exit_code == 1
+    assert result.output == report + "\n"